@@ -1,26 +1,1074 @@
 import paramiko
 import logging
+import sys
 import typing
 from typing import Union,List
 from pathlib import Path
+import concurrent.futures
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import logging.handlers
+import mmap
+import os
+import queue
+import shlex
+import socket
+import stat
+import tarfile
+import tempfile
+import threading
+import time
+import weakref
+from array import array
+from collections import OrderedDict, deque
+from paramiko.sftp import CMD_MKDIR, CMD_OPEN, CMD_CLOSE, CMD_WRITE, CMD_LSTAT, CMD_HANDLE, CMD_STATUS,\
+    SFTP_FLAG_WRITE, SFTP_FLAG_CREATE, SFTP_FLAG_TRUNC
+if typing.TYPE_CHECKING:
+    # remote_index imports this module, RemoteIndex is imported when it is used at run time
+    from remote_index import RemoteIndex
 number_of_folders_created_using_recursion = 0
 
+# states of a Node compared with the remote tree
+ITEM_PRESENT = 'present'
+ITEM_MISSING = 'missing'
+ITEM_NOT_A_FOLDER = 'not_a_folder'
+ITEM_NOT_A_FILE = 'not_a_file'
+# folders with at most this many children are verified with one stat per child instead of a listing
+MAXIMUM_CHILDREN_CHECKED_WITH_STAT = 3
+# file contents are written in requests of this size, the largest write paramiko itself sends
+UPLOAD_CHUNK_SIZE = paramiko.SFTPFile.MAX_REQUEST_SIZE
+# local files at least this large are memory mapped instead of read into memory for uploading
+MEMORY_MAPPED_FILE_THRESHOLD = 1 << 20
+# authentication methods in the order they are tried when RemoteFolderManager.auth_methods is not set, the order
+# paramiko.SSHClient uses
+AUTH_METHODS = ('agent', 'publickey', 'keyboard-interactive', 'password')
+# Unix socket of the connection agent (see connection_agent.py) unless another path is given
+DEFAULT_AGENT_SOCKET_PATH = Path('~/.plus4data/agent.sock')
+
 class Node:
     '''
     Node class to provide flexibility in creating folders, subfolders of varying depth and files depending upon the project requirement.
+    Nodes are slotted and their names interned so large hierarchies stay small, every traversal is iterative so
+    deep hierarchies never hit the recursion limit.
+    A file node can carry content uploaded into the created file: bytes, a local file given as a pathlib.Path, an
+    iterable of bytes chunks (an iterator can only be uploaded once) or a callable returning a new iterable of bytes
+    chunks for every upload. Without content an empty file is created.
     '''
-    def __init__(self, name, subfolders=None, is_file=False):
-        self.name = name
+    __slots__ = ('name', 'is_file', 'subfolders', 'content')
+
+    def __init__(self, name, subfolders=None, is_file=False, content=None):
+        self.name = sys.intern(name) if type(name) is str else name
         self.is_file = is_file
         self.subfolders = subfolders or []
+        if content is not None and (not is_file or isinstance(content, str)):
+            raise TypeError("The 'content' parameter must be bytes, a pathlib.Path, an iterable of bytes or a callable returning one "
+                            "and is only allowed for files.")
+        self.content = content
+
+    def has_one_shot_content(self) -> bool:
+        '''
+            Description:
+                True if the content is an iterator, which is used up by the first upload.
+        '''
+        content = self.content
+        return content is not None and not callable(content) and not isinstance(content, (bytes, bytearray, memoryview, Path))\
+            and iter(content) is content
+
+    def iterate_children(self) -> typing.Iterator['Node']:
+        return Node.expand_templates(self.subfolders)
+
+    @staticmethod
+    def expand_templates(nodes: typing.Iterable['Node']) -> typing.Iterator['Node']:
+        '''
+            Description:
+                Yields the given nodes with every TemplatedNode replaced by the nodes it stands for, lazily.
+        '''
+        for node in nodes:
+            if isinstance(node, TemplatedNode):
+                yield from node.expand()
+            else:
+                yield node
+
+    def has_children(self) -> bool:
+        return bool(self.subfolders)
+
+    def iterate_content_chunks(self, chunk_size: int = UPLOAD_CHUNK_SIZE) -> typing.Iterator[memoryview]:
+        '''
+            Description:
+                Yields the content of a file node in chunks of at most chunk_size bytes without copying it: bytes are
+                sliced, local files of at least MEMORY_MAPPED_FILE_THRESHOLD bytes are memory mapped and smaller ones
+                read at once. A chunk is only valid until the next one is requested. Nodes without content yield nothing.
+        '''
+        content = self.content
+        if content is None:
+            return
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            blocks = [content]
+        elif isinstance(content, Path):
+            with open(content, 'rb') as local_file:
+                size = os.fstat(local_file.fileno()).st_size
+                if size < MEMORY_MAPPED_FILE_THRESHOLD:
+                    blocks = [local_file.read()]
+                else:
+                    with mmap.mmap(local_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        yield from Node._slice_into_chunks(mapped, chunk_size)
+                    return
+        elif callable(content):
+            blocks = content()
+        else:
+            blocks = content
+        for block in blocks:
+            yield from Node._slice_into_chunks(block, chunk_size)
+
+    @staticmethod
+    def _slice_into_chunks(block, chunk_size: int) -> typing.Iterator[memoryview]:
+        # every slice is released once the next one is requested, so a memory map can be closed right after the last
+        with memoryview(block) as view:
+            for offset in range(0, len(view), chunk_size):
+                with view[offset:offset + chunk_size] as chunk:
+                    yield chunk
+
+    def iterate_pre_order(self, level: int = 0) -> typing.Iterator[typing.Tuple[int, 'Node']]:
+        '''
+            Description:
+                Yields (level, node) for this node and all of its descendants, every folder before its children.
+        '''
+        yield level, self
+        stack = [(level + 1, self.iterate_children())]
+        while stack:
+            child_level, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                continue
+            yield child_level, child
+            if not child.is_file:
+                stack.append((child_level + 1, child.iterate_children()))
+
+    def iterate_level_order(self, level: int = 0) -> typing.Iterator[typing.Tuple[int, 'Node']]:
+        '''
+            Description:
+                Yields (level, node) for this node and all of its descendants, one level of the hierarchy after the other.
+        '''
+        waiting = deque([(level, self)])
+        while waiting:
+            current_level, node = waiting.popleft()
+            yield current_level, node
+            if not node.is_file:
+                waiting.extend((current_level + 1, child) for child in node.iterate_children())
+
+    def iterate_lines(self, level: int = 0) -> typing.Iterator[str]:
+        '''
+            Description:
+                Streaming renderer of the hierarchy, yields the lines of __str__ one by one.
+        '''
+        for node_level, node in self.iterate_pre_order(level):
+            yield '  ' * node_level + ('[FILE] ' if node.is_file else '[DIR] ') + f"{node.name}\n"
+
+    def write_to(self, stream: typing.TextIO, level: int = 0) -> None:
+        stream.writelines(self.iterate_lines(level))
 
     def __str__(self, level=0):
-        prefix = '  ' * level + ('[FILE] ' if self.is_file else '[DIR] ')
-        result = f"{prefix}{self.name}\n"
-        for child in self.subfolders:
-            result += child.__str__(level + 1)
+        return ''.join(self.iterate_lines(level))
+
+    def iterate_json_lines(self) -> typing.Iterator[str]:
+        '''
+            Description:
+                Streaming renderer of the hierarchy as JSON Lines, the format read by iterate_json_lines_spec.
+        '''
+        for node_level, node in self.iterate_pre_order():
+            yield json.dumps({'level': node_level, 'name': node.name, 'is_file': bool(node.is_file)}) + '\n'
+
+    @classmethod
+    def from_pre_order(cls, nodes: typing.Iterable[tuple]) -> 'Node':
+        '''
+            Description:
+                Build a hierarchy in one pass from (level, name, is_file) or (level, name, is_file, content) tuples in
+                pre-order, level 0 being the root, as yielded by iterate_local_directory and the spec parsers. Only the
+                folders on the path to the current node are kept aside, so an iterator of tuples is consumed as it
+                comes. CompactNodeTree.from_pre_order takes the same tuples for trees too large for Node objects.
+
+            Returns:
+                Node: The root of the hierarchy.
+        '''
+        root = None
+        # the last node of every level on the path to the current node
+        path = []
+        for level, name, is_file, *content in nodes:
+            if level < 0 or level > len(path) or (level == 0 and root is not None):
+                raise ValueError(f"Node '{name}' at level {level} does not follow the pre-order of the tree.")
+            if level > 0 and path[level - 1].is_file:
+                raise ValueError(f"Node '{name}' can not be added inside a file.")
+            node = cls(name, is_file=is_file, content=content[0] if content else None)
+            if level == 0:
+                root = node
+            else:
+                path[level - 1].subfolders.append(node)
+            del path[level:]
+            path.append(node)
+        if root is None:
+            raise ValueError("The tree is empty.")
+        return root
+
+    @staticmethod
+    def iterate_local_directory(local_folder_path: Union[str, Path], include_content: bool = True,\
+            follow_symlinks: bool = False) -> typing.Iterator[typing.Tuple[int, str, bool, typing.Optional[Path]]]:
+        '''
+            Description:
+                Walks a local folder with os.scandir and yields (level, name, is_file, content) in pre-order for
+                Node.from_pre_order, the root being the folder itself. Entries are sorted by name, content is the
+                pathlib.Path of a file when include_content is True. Links to files become files, links to folders
+                are only walked when follow_symlinks is True and never when the folder is already on the current path.
+                Other entries such as sockets, pipes and dangling links are skipped. Every folder is read completely and closed before its children are walked, so the number of
+                open directories stays one whatever the depth.
+        '''
+        local_folder_path = Path(local_folder_path).expanduser()
+        if not local_folder_path.is_dir():
+            raise NotADirectoryError(f"{local_folder_path} is not a folder")
+        yield 0, local_folder_path.resolve().name, False, None
+        root_stat = os.stat(local_folder_path)
+        folders_on_path = [(root_stat.st_dev, root_stat.st_ino)]
+        stack = [iter(Node._read_local_folder(str(local_folder_path), follow_symlinks))]
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                del folders_on_path[len(stack):]
+                continue
+            name, entry_path, is_folder, folder_id = entry
+            level = len(stack)
+            if not is_folder:
+                yield level, name, True, Path(entry_path) if include_content else None
+            elif folder_id is None or folder_id not in folders_on_path:
+                yield level, name, False, None
+                del folders_on_path[level:]
+                folders_on_path.append(folder_id)
+                stack.append(iter(Node._read_local_folder(entry_path, follow_symlinks)))
+
+    @staticmethod
+    def _read_local_folder(folder_path: str, follow_symlinks: bool) -> List[typing.Tuple[str, str, bool, tuple]]:
+        # (name, path, is_folder, (device, inode) of a folder) of the folders and regular files of folder_path
+        entries = []
+        with os.scandir(folder_path) as iterator:
+            for entry in iterator:
+                if entry.is_dir(follow_symlinks=follow_symlinks):
+                    # only followed links can lead back to a folder on the current path
+                    entry_stat = entry.stat() if follow_symlinks else None
+                    folder_id = (entry_stat.st_dev, entry_stat.st_ino) if entry_stat else None
+                    entries.append((entry.name, entry.path, True, folder_id))
+                elif entry.is_file():
+                    entries.append((entry.name, entry.path, False, None))
+        entries.sort()
+        return entries
+
+    @staticmethod
+    def iterate_spec_lines(lines: typing.Iterable[str]) -> typing.Iterator[typing.Tuple[int, str, bool]]:
+        '''
+            Description:
+                Streaming parser of the text format rendered by __str__ and iterate_lines: one '[DIR] name' or
+                '[FILE] name' per line in pre-order, indented by two spaces per level. Yields (level, name, is_file)
+                for Node.from_pre_order line by line, so an open text file is never read into memory at once.
+                Levels are taken relative to the first line and blank lines are skipped.
+
+                    with open('layout.txt') as spec:
+                        structure = Node.from_pre_order(Node.iterate_spec_lines(spec))
+                    assert str(structure) == open('layout.txt').read()
+        '''
+        first_level = None
+        for line_number, line in enumerate(lines, 1):
+            line = line.rstrip('\r\n')
+            if not line.strip():
+                continue
+            indentation = len(line) - len(line.lstrip(' '))
+            if indentation % 2:
+                raise ValueError(f"line {line_number}: the indentation must be two spaces per level")
+            if line.startswith('[DIR] ', indentation):
+                name, is_file = line[indentation + 6:], False
+            elif line.startswith('[FILE] ', indentation):
+                name, is_file = line[indentation + 7:], True
+            else:
+                raise ValueError(f"line {line_number}: expected '[DIR] name' or '[FILE] name'")
+            if first_level is None:
+                first_level = indentation // 2
+            yield indentation // 2 - first_level, name, is_file
+
+    @staticmethod
+    def iterate_json_lines_spec(lines: typing.Iterable[str]) -> typing.Iterator[typing.Tuple[int, str, bool]]:
+        '''
+            Description:
+                Streaming parser of JSON Lines specs as rendered by iterate_json_lines: one object
+                {"level": 1, "name": "fauna", "is_file": false} per line in pre-order, is_file defaulting to false.
+                Yields (level, name, is_file) for Node.from_pre_order line by line.
+        '''
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                yield record['level'], record['name'], bool(record.get('is_file', False))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                raise ValueError(f"line {line_number}: expected an object with level and name, {e}") from None
+
+    @staticmethod
+    def iterate_json_spec(document: typing.Dict[str, typing.Any]) -> typing.Iterator[typing.Tuple[int, str, bool]]:
+        '''
+            Description:
+                Yields (level, name, is_file) in pre-order for Node.from_pre_order from a nested JSON document
+                {"name": "datas", "children": [{"name": "fauna"}, {"name": "app.ini", "is_file": true}]} already
+                loaded with json.load. A nested document has to be parsed whole, generated specs too large for memory
+                are better written as JSON Lines (see iterate_json_lines_spec).
+        '''
+        stack = [iter([document])]
+        while stack:
+            record = next(stack[-1], None)
+            if record is None:
+                stack.pop()
+                continue
+            if not isinstance(record, dict) or 'name' not in record:
+                raise ValueError(f"Every node of a JSON spec must be an object with a name, got {record!r}")
+            yield len(stack) - 1, record['name'], bool(record.get('is_file', False))
+            stack.append(iter(record.get('children') or ()))
+
+    @classmethod
+    def from_spec_file(cls, spec_file_path: Union[str, Path]) -> 'Node':
+        '''
+            Description:
+                Build a hierarchy from a spec file: a .jsonl file is read as JSON Lines, a .json file as a nested
+                JSON document and any other file as the indented '[DIR]'/'[FILE]' text format of __str__.
+        '''
+        spec_file_path = Path(spec_file_path).expanduser()
+        with open(spec_file_path, encoding='utf-8') as spec_file:
+            if spec_file_path.suffix == '.jsonl':
+                return cls.from_pre_order(cls.iterate_json_lines_spec(spec_file))
+            if spec_file_path.suffix == '.json':
+                return cls.from_pre_order(cls.iterate_json_spec(json.load(spec_file)))
+            return cls.from_pre_order(cls.iterate_spec_lines(spec_file))
+
+
+class TemplatedNode(Node):
+    '''
+    A run of sibling nodes generated from a name pattern, for regular layouts such as shard_0000 .. shard_9999 each
+    holding the same in/ out/ tmp/ subtree. name is a str.format pattern applied to every value of values and all
+    generated nodes share subfolders as their children. The walks of RemoteFolderManager expand it lazily, so the
+    generated nodes are never materialized together.
+    Since every generated node shares the content and the children, contents given as iterators are refused in the
+    template and below it, a callable returning a new iterable gives every generated file its content.
+
+    Example: TemplatedNode('shard_{:04d}', range(10000), [Node('in'), Node('out'), Node('tmp')])
+    '''
+    __slots__ = ('values',)
+
+    def __init__(self, name, values, subfolders=None, is_file=False, content=None):
+        if not isinstance(name, str):
+            raise TypeError("The 'name' parameter must be a str.format pattern.")
+        if iter(values) is values:
+            raise TypeError("The 'values' parameter must be re-iterable like a range, list or tuple, not an iterator.")
+        super().__init__(name, subfolders, is_file, content)
+        self.values = values
+        # the shared children are walked as given, nested templates were checked when they were built
+        waiting = [self]
+        while waiting:
+            node = waiting.pop()
+            if node.has_one_shot_content():
+                raise TypeError(f"The content of '{node.name}' is an iterator shared by every node generated from "
+                                f"'{name}', it would only be uploaded once. Give bytes, a pathlib.Path or a callable "
+                                "returning a new iterable instead.")
+            if node is self or not isinstance(node, TemplatedNode):
+                waiting.extend(node.subfolders)
+
+    def expand(self) -> typing.Iterator[Node]:
+        for value in self.values:
+            yield Node(self.name.format(value), self.subfolders, self.is_file, self.content)
+
+
+class CompactNode(Node):
+    '''
+    Read only view of one node of a CompactNodeTree. It behaves like a Node so every RemoteFolderManager walk
+    accepts it, views are created on the fly while walking and are not kept by the tree.
+    '''
+    __slots__ = ('_tree', '_index')
+
+    def __init__(self, tree: 'CompactNodeTree', index: int):
+        self._tree = tree
+        self._index = index
+
+    @property
+    def name(self) -> str:
+        return self._tree.names[self._tree.name_indexes[self._index]]
+
+    @property
+    def is_file(self) -> bool:
+        return bool(self._tree.is_file_flags[self._index])
+
+    @property
+    def subfolders(self) -> List['CompactNode']:
+        return list(self.iterate_children())
+
+    @property
+    def content(self) -> None:
+        # the arrays only hold the structure, files of a compact tree are created empty
+        return None
+
+    def iterate_children(self) -> typing.Iterator['CompactNode']:
+        tree = self._tree
+        child = tree.first_child[self._index]
+        while child != -1:
+            yield CompactNode(tree, child)
+            child = tree.next_sibling[child]
+
+    def has_children(self) -> bool:
+        return self._tree.first_child[self._index] != -1
+
+
+class CompactNodeTree:
+    '''
+    Array backed form of a Node hierarchy for very large trees. Nodes are stored in pre-order as parallel arrays
+    (name index into an interned name table, parent, first child and next sibling indexes and a file flag), which
+    takes a few bytes per node instead of one Python object plus a list per node.
+    root() returns a CompactNode view which can be used wherever a Node is expected.
+    '''
+    def __init__(self):
+        self.names = []
+        self._name_table = {}
+        self.name_indexes = array('I')
+        self.parents = array('i')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.is_file_flags = bytearray()
+        # index of the last appended node of every level, used to link appended nodes
+        self._last_node_per_level = []
+
+    def append(self, level: int, name: str, is_file: bool = False) -> int:
+        '''
+            Description:
+                Append the next node of a pre-order walk, level 0 being the root.
+            Returns:
+                int: The index of the appended node.
+        '''
+        if level < 0 or level > len(self._last_node_per_level) or (level == 0 and self.is_file_flags):
+            raise ValueError(f"Node '{name}' at level {level} does not follow the pre-order of the tree.")
+        if level > 0 and self.is_file_flags[self._last_node_per_level[level - 1]]:
+            raise ValueError(f"Node '{name}' can not be added inside a file.")
+        index = len(self.is_file_flags)
+        name_index = self._name_table.get(name)
+        if name_index is None:
+            name_index = self._name_table[name] = len(self.names)
+            self.names.append(sys.intern(name))
+        parent = self._last_node_per_level[level - 1] if level > 0 else -1
+        self.name_indexes.append(name_index)
+        self.parents.append(parent)
+        self.first_child.append(-1)
+        self.next_sibling.append(-1)
+        self.is_file_flags.append(1 if is_file else 0)
+        if level < len(self._last_node_per_level):
+            previous = self._last_node_per_level[level]
+            if previous != -1 and self.parents[previous] == parent:
+                self.next_sibling[previous] = index
+            del self._last_node_per_level[level:]
+        if parent != -1 and self.first_child[parent] == -1:
+            self.first_child[parent] = index
+        self._last_node_per_level.append(index)
+        return index
+
+    @classmethod
+    def from_pre_order(cls, nodes: typing.Iterable[typing.Tuple[int, str, bool]]) -> 'CompactNodeTree':
+        '''
+            Description:
+                Build a tree from (level, name, is_file) tuples in pre-order, further items such as the content
+                yielded by Node.iterate_local_directory are ignored since the arrays only hold the structure.
+        '''
+        tree = cls()
+        for level, name, is_file, *_ in nodes:
+            tree.append(level, name, is_file)
+        return tree
+
+    @classmethod
+    def from_node(cls, node: Node) -> 'CompactNodeTree':
+        return cls.from_pre_order((level, child.name, child.is_file) for level, child in node.iterate_pre_order())
+
+    def __len__(self) -> int:
+        return len(self.is_file_flags)
+
+    def root(self) -> CompactNode:
+        if not self.is_file_flags:
+            raise ValueError("The tree is empty.")
+        return CompactNode(self, 0)
+
+    def to_node(self) -> Node:
+        '''
+            Description:
+                Expand the tree into regular Node objects.
+        '''
+        nodes = [Node(self.names[self.name_indexes[index]], is_file=bool(self.is_file_flags[index]))
+                 for index in range(len(self))]
+        for index in range(1, len(self)):
+            nodes[self.parents[index]].subfolders.append(nodes[index])
+        return nodes[0]
+
+    def iterate_lines(self) -> typing.Iterator[str]:
+        return self.root().iterate_lines()
+
+    def __str__(self):
+        return ''.join(self.iterate_lines())
+
+class SFTPOperationMetrics:
+    '''
+    Counts, payload bytes and latency histograms per type of SFTP operation (mkdir, stat, lstat, listdir, open,
+    close, exec) made by RemoteFolderManager on one connection, see RemoteFolderManager.enable_instrumentation.
+    Latencies are bucketed in powers of two starting at 0.1 ms, bytes are the paths, names and data carried by the
+    requests and replies. callback, if given, is called with (operation, seconds, number_of_bytes) for every operation.
+    '''
+    FIRST_BUCKET_SECONDS = 0.0001
+    NUMBER_OF_BUCKETS = 24
+
+    def __init__(self, callback: typing.Optional[typing.Callable[[str, float, int], None]] = None):
+        self.callback = callback
+        self.counts = {}
+        self.bytes = {}
+        self.seconds = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float, number_of_bytes: int = 0) -> None:
+        bucket = 0
+        while bucket < self.NUMBER_OF_BUCKETS - 1 and seconds > self.FIRST_BUCKET_SECONDS * 2 ** bucket:
+            bucket += 1
+        with self._lock:
+            if operation not in self.counts:
+                self.counts[operation] = 0
+                self.bytes[operation] = 0
+                self.seconds[operation] = 0.0
+                self.histograms[operation] = [0] * self.NUMBER_OF_BUCKETS
+            self.counts[operation] += 1
+            self.bytes[operation] += number_of_bytes
+            self.seconds[operation] += seconds
+            self.histograms[operation][bucket] += 1
+        if self.callback is not None:
+            self.callback(operation, seconds, number_of_bytes)
+
+    def percentile(self, operation: str, fraction: float) -> float:
+        '''
+            Description:
+                Upper bound in seconds of the histogram bucket holding the given fraction (0.5 for the median) of the calls.
+        '''
+        histogram = self.histograms.get(operation)
+        if not histogram:
+            return 0.0
+        wanted = fraction * self.counts[operation]
+        seen = 0
+        for bucket, count in enumerate(histogram):
+            seen += count
+            if seen >= wanted:
+                return self.FIRST_BUCKET_SECONDS * 2 ** bucket
+        return self.FIRST_BUCKET_SECONDS * 2 ** (self.NUMBER_OF_BUCKETS - 1)
+
+    def summary(self) -> typing.Dict[str, typing.Dict[str, typing.Union[int, float]]]:
+        return {operation: {'count': self.counts[operation], 'bytes': self.bytes[operation],
+                            'total_seconds': self.seconds[operation],
+                            'mean_seconds': self.seconds[operation] / self.counts[operation],
+                            'p50_seconds': self.percentile(operation, 0.5),
+                            'p99_seconds': self.percentile(operation, 0.99)}
+                for operation in sorted(self.counts)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts.clear()
+            self.bytes.clear()
+            self.seconds.clear()
+            self.histograms.clear()
+
+    def __str__(self):
+        result = f"{'operation':<10}{'count':>10}{'bytes':>14}{'total s':>12}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}\n"
+        for operation, values in self.summary().items():
+            result += f"{operation:<10}{values['count']:>10}{values['bytes']:>14}{values['total_seconds']:>12.3f}"\
+                      f"{values['mean_seconds'] * 1000:>10.2f}{values['p50_seconds'] * 1000:>10.2f}{values['p99_seconds'] * 1000:>10.2f}\n"
+        return result
+
+
+class SFTPRequestPipeline:
+    '''
+    Sends SFTP requests over one SFTP client without waiting for their replies.
+    At most max_requests_in_flight requests are outstanding at any time, replies are collected as they arrive
+    and handed out one by one through next_response.
+    paramiko has no public API for this, so the pipeline is the one place using private members of paramiko
+    (SFTPClient._async_request, _read_response, _adjust_cwd, _convert_status, SFTPAttributes._from_msg and the int
+    subclass paramiko packs as an int64). They are checked once against SUPPORTED_PARAMIKO_VERSIONS.
+    '''
+    # [first supported, first unsupported) (major, minor) version of paramiko
+    SUPPORTED_PARAMIKO_VERSIONS = ((2, 0), (4, 0))
+    # int subclass packed as a 64 bit integer by SFTPClient._async_request, set by check_paramiko_support
+    _int64 = None
+
+    @classmethod
+    def check_paramiko_support(cls) -> None:
+        '''
+            Description:
+                Raise RuntimeError if the installed paramiko lacks the private members the pipeline uses.
+        '''
+        if cls._int64 is not None:
+            return
+        import paramiko.sftp_client
+        version = tuple(int(part) for part in paramiko.__version__.split('.')[:2] if part.isdigit())
+        first_supported, first_unsupported = cls.SUPPORTED_PARAMIKO_VERSIONS
+        # paramiko 2 packs its py3compat.long as an int64, paramiko 3 its sftp.int64
+        int64 = getattr(paramiko.sftp_client, 'int64', None) or getattr(paramiko.sftp_client, 'long', None)
+        members_present = all(hasattr(paramiko.SFTPClient, name) for name in\
+            ('_async_request', '_read_response', '_adjust_cwd', '_convert_status')) and hasattr(paramiko.SFTPAttributes, '_from_msg')
+        if not first_supported <= version < first_unsupported or not members_present\
+                or not isinstance(int64, type) or int64 is int or not issubclass(int64, int):
+            raise RuntimeError(f"Pipelined SFTP requests are not supported with paramiko {paramiko.__version__}, "
+                               f"a version from {'.'.join(map(str, first_supported))} and below "
+                               f"{'.'.join(map(str, first_unsupported))} is required.")
+        cls._int64 = int64
+
+    def __init__(self, sftp: paramiko.SFTPClient, max_requests_in_flight: int = 64,\
+            metrics: typing.Optional[SFTPOperationMetrics] = None):
+        self.check_paramiko_support()
+        self.sftp = sftp
+        self.max_requests_in_flight = max_requests_in_flight
+        self.metrics = metrics
+        self.requests_in_flight = 0
+        self.responses = {}
+        # request number -> (operation, send time, request bytes), only kept when metrics are recorded
+        self._sent = {}
+
+    def _async_response(self, t, msg, num):
+        # called by paramiko from SFTPClient._read_response for every reply addressed to this pipeline
+        self.responses[num] = (t, msg)
+        self.requests_in_flight -= 1
+        if self.metrics is not None:
+            operation, sent_at, number_of_bytes = self._sent.pop(num)
+            self.metrics.record(operation, time.perf_counter() - sent_at, number_of_bytes)
+
+    def has_free_slot(self) -> bool:
+        return self.requests_in_flight < self.max_requests_in_flight
+
+    def send(self, t: int, *args, operation: str = 'request') -> int:
+        '''
+            Description:
+                Send one request, first waiting for replies if the window of requests in flight is full.
+            Returns:
+                int: The request number used to match the reply in next_response.
+        '''
+        while not self.has_free_slot():
+            self.sftp._read_response()
+        self.requests_in_flight += 1
+        sent_at = time.perf_counter()
+        num = self.sftp._async_request(self, t, *args)
+        if self.metrics is not None:
+            self._sent[num] = (operation, sent_at, sum(len(arg) for arg in args if isinstance(arg, (str, bytes, memoryview))))
+        return num
+
+    def send_mkdir(self, path: str, mode: int = 0o777) -> int:
+        attr = paramiko.SFTPAttributes()
+        attr.st_mode = mode
+        return self.send(CMD_MKDIR, self.sftp._adjust_cwd(path), attr, operation='mkdir')
+
+    def send_open_for_write(self, path: str) -> int:
+        flags = SFTP_FLAG_WRITE | SFTP_FLAG_CREATE | SFTP_FLAG_TRUNC
+        return self.send(CMD_OPEN, self.sftp._adjust_cwd(path), flags, paramiko.SFTPAttributes(), operation='open')
+
+    def send_write(self, handle: bytes, offset: int, data: typing.Union[bytes, memoryview]) -> int:
+        # the offset is a 64 bit integer, paramiko packs its own subclass of int as one
+        return self.send(CMD_WRITE, handle, self._int64(offset), data, operation='write')
+
+    def send_close(self, handle: bytes) -> int:
+        return self.send(CMD_CLOSE, handle, operation='close')
+
+    def send_lstat(self, path: str) -> int:
+        return self.send(CMD_LSTAT, self.sftp._adjust_cwd(path), operation='lstat')
+
+    def next_response(self) -> typing.Tuple[int, int, paramiko.Message]:
+        '''
+            Description:
+                Wait until at least one reply is available and return it.
+            Returns:
+                tuple: request number, reply type and the reply message.
+        '''
+        while not self.responses:
+            self.sftp._read_response()
+        num = next(iter(self.responses))
+        t, msg = self.responses.pop(num)
+        return num, t, msg
+
+    def raise_for_status(self, t: int, msg: paramiko.Message) -> None:
+        '''
+            Description:
+                Raise the IOError paramiko would have raised for a failed synchronous request.
+        '''
+        if t == CMD_STATUS:
+            self.sftp._convert_status(msg)
+
+    def read_attributes(self, t: int, msg: paramiko.Message) -> paramiko.SFTPAttributes:
+        '''
+            Description:
+                The attributes carried by the reply of a stat or lstat request, raising its IOError if it failed.
+        '''
+        self.raise_for_status(t, msg)
+        return paramiko.SFTPAttributes._from_msg(msg)
+
+
+class _PipelinedUpload:
+    '''
+    State of one file of RemoteFolderManager._create_subtrees_pipelined whose content is being written.
+    chunks is None once every chunk was sent or the upload was stopped.
+    '''
+    __slots__ = ('path', 'handle', 'chunks', 'offset', 'writes_in_flight', 'digest', 'closing', 'failed')
+
+    def __init__(self, path: str, handle: bytes, chunks: typing.Iterator[memoryview]):
+        self.path = path
+        self.handle = handle
+        self.chunks = chunks
+        self.offset = 0
+        self.writes_in_flight = 0
+        self.digest = hashlib.sha256()
+        self.closing = False
+        self.failed = False
+
+
+class _ContentReader:
+    '''
+    Readable file object over the content of a file node for tarfile, which needs the size before the content.
+    Content of unknown size (an iterable of chunks) is spooled into a temporary file first, in memory while small.
+    digest is the sha256 of everything read so far.
+    '''
+    def __init__(self, node: Node):
+        self.digest = hashlib.sha256()
+        self._pending = b''
+        self._chunks = node.iterate_content_chunks()
+        if isinstance(node.content, Path):
+            self.size = node.content.stat().st_size
+        elif isinstance(node.content, (bytes, bytearray, memoryview)):
+            self.size = memoryview(node.content).nbytes
+        else:
+            spooled = tempfile.SpooledTemporaryFile(max_size=MEMORY_MAPPED_FILE_THRESHOLD)
+            for chunk in self._chunks:
+                spooled.write(chunk)
+            self.size = spooled.tell()
+            spooled.seek(0)
+            def read_spooled():
+                with spooled:
+                    yield from iter(lambda: spooled.read(UPLOAD_CHUNK_SIZE), b'')
+            self._chunks = read_spooled()
+
+    def read(self, size: int = -1) -> bytes:
+        parts = []
+        while size < 0 or size > 0:
+            if not self._pending:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                # chunks are only valid until the next one is requested
+                self._pending = bytes(chunk)
+                self.digest.update(self._pending)
+            if size < 0:
+                parts.append(self._pending)
+                self._pending = b''
+            else:
+                parts.append(self._pending[:size])
+                self._pending = self._pending[size:]
+                size -= len(parts[-1])
+        return b''.join(parts)
+
+
+class RemoteMetadataCache:
+    '''
+    Bounded cache of stat/lstat results, negative lookups and folder listings of one SSH connection.
+    Entries expire after ttl_seconds, the least recently used entry is dropped once max_entries is reached and
+    creations made through RemoteFolderManager update the cache so it stays correct after our own writes.
+    '''
+    def __init__(self, max_entries: int = 100000, ttl_seconds: float = 30.0):
+        if not isinstance(max_entries, int) or max_entries < 1:
+            raise ValueError("The 'max_entries' parameter must be a positive int.")
+        if not isinstance(ttl_seconds, (int, float)) or ttl_seconds <= 0:
+            raise ValueError("The 'ttl_seconds' parameter must be a positive number.")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        # (kind, path) -> (expiry time, value), kind is 'stat', 'lstat' or 'listdir', value None is a negative lookup
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, path: str) -> typing.Tuple[bool, typing.Any]:
+        '''
+            Description:
+                Look up a cached value.
+            Returns:
+                tuple: (True, value) on a hit, (False, None) on a miss or an expired entry.
+        '''
+        with self._lock:
+            entry = self._entries.get((kind, path))
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[(kind, path)]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end((kind, path))
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, kind: str, path: str, value: typing.Any) -> None:
+        with self._lock:
+            self._entries[(kind, path)] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end((kind, path))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_created(self, path: str, is_file: bool) -> None:
+        '''
+            Description:
+                Update the cache after path was created as a file or folder by this client.
+        '''
+        attr = paramiko.SFTPAttributes()
+        attr.st_mode = (stat.S_IFREG | 0o644) if is_file else (stat.S_IFDIR | 0o755)
+        attr.filename = path.rsplit('/', 1)[-1]
+        self.put('stat', path, attr)
+        self.put('lstat', path, attr)
+        if not is_file:
+            self.put('listdir', path, [])
+        with self._lock:
+            parent_listing = self._entries.get(('listdir', path.rsplit('/', 1)[0]))
+            if parent_listing is not None and parent_listing[1] is not None:
+                # keep the cached listing of the parent folder complete
+                listing = [entry for entry in parent_listing[1] if entry.filename != attr.filename]
+                listing.append(attr)
+                self._entries[('listdir', path.rsplit('/', 1)[0])] = (parent_listing[0], listing)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def statistics(self) -> typing.Dict[str, typing.Union[int, float]]:
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries),
+                'hit_ratio': self.hits / lookups if lookups else 0.0}
+
+
+class CreationJournal:
+    '''
+    Local append-only journal of the folders and files created below base_folder_path, used by
+    RemoteFolderManager.create_folder_path_recursively to resume an interrupted creation. Every line is the path of
+    one completed creation relative to base_folder_path ('.' for the base folder itself). Lines are buffered and
+    written with an fsync every batch_size entries, so a crash loses at most the last batch, which is checked on the
+    server when resuming. The file name is a hash of the host, the base path and the structure, so a changed
+    structure never resumes from an old journal.
+    '''
+    def __init__(self, journal_file_path: Union[str, Path], base_folder_path: Union[str, Path], batch_size: int = 1000):
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError("The 'batch_size' parameter must be a positive int.")
+        self.journal_file_path = Path(journal_file_path)
+        self.base_folder_path = str(base_folder_path)
+        self.batch_size = batch_size
+        # relative paths read from an existing journal
+        self.completed_paths = set()
+        # number of paths recorded by this run
+        self.number_of_recorded_paths = 0
+        self._pending_lines = []
+        self._file = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def journal_file_path_for(journal_folder_path: Union[str, Path], hostname: str, port: int, base_folder_path: Union[str, Path],\
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: Node) -> Path:
+        '''
+            Description:
+                Path of the journal inside journal_folder_path for one host, base path and structure. The structure
+                is hashed node by node in pre-order, templated nodes expanded.
+        '''
+        digest = hashlib.sha256(f"{hostname}\n{port}\n{base_folder_path}\n".encode())
+        for root in Node.expand_templates([hierarchy_of_folders_to_be_created_inside_root_folder_path]):
+            for level, node in root.iterate_pre_order():
+                digest.update(f"{level}\t{int(bool(node.is_file))}\t{node.name}\n".encode())
+        return Path(journal_folder_path).expanduser() / f"{digest.hexdigest()}.journal"
+
+    def open(self) -> bool:
+        '''
+            Description:
+                Read the completed paths of an existing journal and open it for appending, or create a new one.
+            Returns:
+                bool: True if a journal of an earlier, unfinished run was found.
+        '''
+        found = self.journal_file_path.exists()
+        if found:
+            with open(self.journal_file_path, 'r', encoding='utf-8', newline='\n') as journal_file:
+                for line in journal_file:
+                    # a line without newline was torn by a crash while writing
+                    if line.endswith('\n') and not line.startswith('#'):
+                        self.completed_paths.add(line[:-1])
+        else:
+            self.journal_file_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.journal_file_path, 'a', encoding='utf-8', newline='\n')
+        if not found:
+            self._file.write(f"# {self.base_folder_path}\n")
+            self._sync()
+        return found
+
+    def is_completed(self, path: str) -> bool:
+        return self._relative_path(path) in self.completed_paths
+
+    def record(self, path: str) -> None:
+        relative_path = self._relative_path(path)
+        if relative_path is None:
+            return
+        with self._lock:
+            self.number_of_recorded_paths += 1
+            self._pending_lines.append(relative_path + '\n')
+            if len(self._pending_lines) >= self.batch_size:
+                self._write_pending_lines()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write_pending_lines()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def is_empty(self) -> bool:
+        '''
+            Description:
+                Whether neither an earlier run nor this one has completed anything, so the journal holds nothing to
+                resume from.
+        '''
+        return not self.completed_paths and self.number_of_recorded_paths == 0
+
+    def remove(self) -> None:
+        '''
+            Description:
+                Close and delete the journal once the creation is complete.
+        '''
+        self.close()
+        self.journal_file_path.unlink()
+
+    def _relative_path(self, path: str) -> typing.Optional[str]:
+        if path == self.base_folder_path:
+            return '.'
+        if path.startswith(self.base_folder_path + '/'):
+            return path[len(self.base_folder_path) + 1:]
+        return None
+
+    def _write_pending_lines(self) -> None:
+        if self._pending_lines and self._file is not None:
+            self._file.writelines(self._pending_lines)
+            self._pending_lines = []
+            self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+class ReconciliationPlan:
+    '''
+    Differences between a Node structure and the remote tree below base_folder_path as computed by
+    RemoteFolderManager.plan_reconciliation.
+    missing_folders/missing_files list every path that has to be created, type_conflicts every path whose type
+    on the server differs from the structure and subtrees_to_create the minimal (existing parent path, node) pairs
+    that create all missing items.
+    '''
+    def __init__(self, base_folder_path: Union[str, Path]):
+        self.base_folder_path = str(base_folder_path)
+        self.base_folder_missing = False
+        self.missing_folders = []
+        self.missing_files = []
+        self.type_conflicts = []
+        self.subtrees_to_create = []
+        self.number_of_folders_and_files_created = 0
+
+    def has_differences(self) -> bool:
+        return bool(self.base_folder_missing or self.subtrees_to_create or self.type_conflicts)
+
+    def __str__(self):
+        result = f"Reconciliation of {self.base_folder_path}: {len(self.missing_folders)} missing folders, "\
+                 f"{len(self.missing_files)} missing files, {len(self.type_conflicts)} type conflicts\n"
+        for path in self.missing_folders:
+            result += f"  [MISSING DIR] {path}\n"
+        for path in self.missing_files:
+            result += f"  [MISSING FILE] {path}\n"
+        for path in self.type_conflicts:
+            result += f"  [CONFLICT] {path}\n"
         return result
 
+
+def _escape_like_tar(name: str) -> str:
+    # the form in which GNU tar -v prints a member name: backslashes doubled, control characters as C escapes
+    escaped = []
+    for character in name:
+        if character == '\\':
+            escaped.append('\\\\')
+        elif character in '\a\b\f\n\r\t\v':
+            escaped.append('\\' + 'abfnrtv'['\a\b\f\n\r\t\v'.index(character)])
+        elif ord(character) < 0x20 or ord(character) == 0x7f:
+            escaped.append(f"\\{ord(character):03o}")
+        else:
+            escaped.append(character)
+    return ''.join(escaped)
+
+
+class _AgentConnection:
+    '''
+    Stands for the SSH connection of the connection agent behind a client and the channels of its pool, each relayed
+    over its own Unix socket. It keys the per connection registries of RemoteFolderManager like the transport of a
+    direct connection.
+    '''
+
+
+class _AgentSocket(socket.socket):
+    '''
+    Unix socket to the connection agent carrying an SFTP session, paramiko.SFTPClient names it in its log messages.
+    connection is the _AgentConnection shared with the other channels opened for the same pool.
+    '''
+    connection = None
+
+    def get_name(self) -> str:
+        return f"agent:{self.getpeername()}"
+
+
+class HostResult:
+    '''
+    Outcome of one host of RemoteFolderManager.apply_to_hosts. result holds the return value of the operation
+    (number of created items, ReconciliationPlan or number of verified items), error the exception if it failed,
+    connect_seconds and seconds the time spent connecting and in total.
+    '''
+    def __init__(self, hostname: str, base_folder_path: str):
+        self.hostname = hostname
+        self.base_folder_path = base_folder_path
+        self.result = None
+        self.error = None
+        self.connect_seconds = 0.0
+        self.seconds = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+    def __str__(self):
+        if self.error is not None:
+            return f"{self.hostname}:{self.base_folder_path} failed after {self.seconds:.3f} s: {self.error!r}"
+        return f"{self.hostname}:{self.base_folder_path} {self.result} in {self.seconds:.3f} s (connect {self.connect_seconds:.3f} s)"
+
+
+class classmethod_or_instancemethod:
+    '''
+    Like classmethod, but called on an instance the method is bound to the instance. The methods of
+    RemoteFolderManager read their configuration from cls, so they use the class defaults when called on the class
+    and the configuration of a manager when called on an instance of it.
+    '''
+    def __init__(self, function):
+        self.__func__ = function
+        self.__doc__ = function.__doc__
+        self.__wrapped__ = function
+
+    def __get__(self, instance, owner=None):
+        return self.__func__.__get__(owner if instance is None else instance, owner)
+
+
 class RemoteFolderManager:
     
     default_host_path = ''
@@ -29,12 +1077,42 @@ class RemoteFolderManager:
     username = ''
     password =''
     port = 22
+    # authentication methods tried in this order by connect_to_sftp, for example ('password',) to skip public keys
+    # which are known to fail, None for the order of paramiko.SSHClient (see AUTH_METHODS)
+    auth_methods = None
+    # Unix socket of a running connection agent to get warm connections from, None to always connect directly
+    agent_socket_path = None
+    # False logs only errors and one summary per operation instead of one message per folder, file or path component
+    log_node_events = True
+    # metadata caches enabled with enable_metadata_cache, one per SSH transport
+    _metadata_caches = weakref.WeakKeyDictionary()
+    # operation metrics enabled with enable_instrumentation, one per SSH transport
+    _operation_metrics = weakref.WeakKeyDictionary()
+    # journal of the running journaled creation, one per SSH transport
+    _creation_journals = weakref.WeakKeyDictionary()
+    # path -> sha256 of the uploaded content, enabled with enable_upload_checksums, one per SSH transport
+    _upload_checksums = weakref.WeakKeyDictionary()
 
-    @classmethod
+    def __init__(self, host_path: typing.Optional[str] = None, hierarchy_of_folders_to_be_created_inside_root_folder_path: Node=None,\
+                 hostname:str=None, username:str=None, password:str=None, port:int=None, log_node_events:bool=None,\
+                 auth_methods: typing.Optional[typing.Sequence[str]] = None, agent_socket_path: Union[None, str, Path] = None):
+        '''
+            A manager for one host. Every value which is not given falls back to the class defaults set with
+            set_defaults, the methods called on the manager use its own values so several hosts can be managed
+            in one process.
+        '''
+        self.set_defaults(host_path=host_path,\
+            hierarchy_of_folders_to_be_created_inside_root_folder_path=hierarchy_of_folders_to_be_created_inside_root_folder_path,\
+            hostname=hostname, username=username, password=password, port=port, log_node_events=log_node_events,\
+            auth_methods=auth_methods, agent_socket_path=agent_socket_path)
+
+    @classmethod_or_instancemethod
     def set_defaults(cls, host_path: typing.Optional[str] = None, hierarchy_of_folders_to_be_created_inside_root_folder_path: Node=None,\
-                      hostname:str=None, username:str=None, password:str=None):
+                      hostname:str=None, username:str=None, password:str=None, port:int=None, log_node_events:bool=None,\
+                      auth_methods: typing.Optional[typing.Sequence[str]] = None, agent_socket_path: Union[None, str, Path] = None):
         '''
-            Function to update the default values inside the class.
+            Function to update the default values inside the class, or the values of one manager when called on an
+            instance.
             Args:
             host_path: The path of the remote host in which the operations are to be performed.
             hierarchy_of_folders_to_be_created_inside_root_folder_path: The hierarchical structure of folders, subfolders that are 
@@ -43,6 +1121,11 @@ class RemoteFolderManager:
             hostname: The hostname or IP address of the remote server.
             username: The username to log in to the remote server.
             password: The password for the remote server.
+            port: The SSH port of the remote server.
+            log_node_events: False to log only errors and one summary per operation instead of a message per node.
+            auth_methods: The authentication methods to try in this order, out of AUTH_METHODS.
+            agent_socket_path: The Unix socket of a running connection agent, connect_to_sftp gets its connections
+            from the agent and connects directly only if no agent is running.
         '''
         # Update only the provided defaults
         if host_path is not None:
@@ -55,182 +1138,1312 @@ class RemoteFolderManager:
             cls.username = username
         if password is not None:
             cls.password = password
+        if port is not None:
+            cls.port = port
+        if log_node_events is not None:
+            cls.log_node_events = log_node_events
+        if auth_methods is not None:
+            if isinstance(auth_methods, str) or not set(auth_methods) <= set(AUTH_METHODS):
+                raise ValueError(f"The 'auth_methods' parameter must be a sequence out of {AUTH_METHODS}.")
+            cls.auth_methods = tuple(auth_methods)
+        if agent_socket_path is not None:
+            cls.agent_socket_path = agent_socket_path
         
-    @classmethod
+    @classmethod_or_instancemethod
     def connect_to_sftp(
         cls,
-        logger: typing.Union[None, logging.Logger] = None
+        logger: typing.Union[None, logging.Logger] = None,
+        timeout_seconds: typing.Optional[float] = None
     ) -> paramiko.SFTPClient:
         """
-        Establish an SFTP connection to the remote host.
-        
+        Establish an SFTP connection to the remote host.
+        
+        Args:
+            logger: Logger for logging purposes, or None if not needed.
+            timeout_seconds: Timeout of the TCP connect and the SSH handshake, None to wait indefinitely.
+
+        Returns:
+            paramiko.SFTPClient: The connected SFTP client.
+        
+        """
+        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
+        if not isinstance(cls.hostname, (str)):
+            raise TypeError("The 'hostname' parameter must be a string.")   
+        
+        if not isinstance(cls.username, (str)):
+            raise TypeError("The 'username' parameter must be a string.")    
+        
+        if not isinstance(cls.port, (int)):
+            raise TypeError("The 'port' parameter must be a int.") 
+        
+        if not isinstance(logger, (logging.Logger, type(None))):
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
+        if cls.agent_socket_path is not None:
+            try:
+                sftp = cls._open_sftp_through_agent(timeout_seconds)
+                if logger:
+                    logger.info(f"Successfully connected to {cls.hostname} through the connection agent")
+                return sftp
+            except OSError as e:
+                if logger:
+                    logger.warning(f"Connection agent at {cls.agent_socket_path} is not available, connecting directly: {e}")
+        try:
+            if cls.auth_methods is None:
+                ssh = paramiko.SSHClient()
+                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                ssh.connect(cls.hostname, username=cls.username, password=cls.password, port=cls.port,\
+                            timeout=timeout_seconds, banner_timeout=timeout_seconds, auth_timeout=timeout_seconds)
+                # small SFTP requests must not wait for Nagle's algorithm
+                ssh.get_transport().sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sftp = ssh.open_sftp()
+            else:
+                sftp = paramiko.SFTPClient.from_transport(cls.open_authenticated_transport(timeout_seconds))
+            if logger:
+                logger.info(f"Successfully connected to {cls.hostname}")
+            return sftp
+        except paramiko.AuthenticationException:
+            if logger:
+                logger.error(f"Authentication failed when connecting to {cls.hostname}")
+            raise
+        except paramiko.SSHException as e:
+            if logger:
+                logger.error(f"Failed to establish an SSH connection: {str(e)}")
+            raise
+
+
+    @classmethod_or_instancemethod
+    def open_authenticated_transport(cls, timeout_seconds: typing.Optional[float] = None) -> paramiko.Transport:
+        """
+        Open an SSH transport to hostname:port and authenticate as username, trying the methods of auth_methods (or
+        AUTH_METHODS) in their order and stopping at the first one that succeeds. Like the AutoAddPolicy of
+        connect_to_sftp the host key of the server is accepted.
+
+        Args:
+            timeout_seconds: Timeout of the TCP connect, the SSH handshake and every authentication attempt.
+
+        Returns:
+            paramiko.Transport: The authenticated transport.
+
+        Raises:
+            paramiko.AuthenticationException: If none of the methods succeeded.
+        """
+        sock = socket.create_connection((cls.hostname, cls.port), timeout_seconds)
+        # small SFTP requests must not wait for Nagle's algorithm
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        transport = paramiko.Transport(sock)
+        try:
+            transport.banner_timeout = timeout_seconds or transport.banner_timeout
+            transport.start_client(timeout=timeout_seconds)
+            failures = []
+            for method in cls.auth_methods or AUTH_METHODS:
+                try:
+                    if method == 'password':
+                        transport.auth_password(cls.username, cls.password)
+                    elif method == 'keyboard-interactive':
+                        transport.auth_interactive(cls.username, lambda title, instructions, prompts: [cls.password] * len(prompts))
+                    else:
+                        keys = list(cls._private_keys(method))
+                        if not keys:
+                            failures.append(f"{method}: no keys")
+                        for key in keys:
+                            try:
+                                transport.auth_publickey(cls.username, key)
+                                break
+                            except paramiko.AuthenticationException as e:
+                                failures.append(f"{method} {key.get_name()}: {e}")
+                except (paramiko.AuthenticationException, paramiko.BadAuthenticationType) as e:
+                    failures.append(f"{method}: {e}")
+                if transport.is_authenticated():
+                    return transport
+            raise paramiko.AuthenticationException(f"Authentication as {cls.username} failed, tried "
+                                                   f"{', '.join(failures) or 'no method'}")
+        except BaseException:
+            transport.close()
+            raise
+
+    @staticmethod
+    def _private_keys(method: str) -> typing.Iterator[paramiko.PKey]:
+        # keys of a running ssh-agent for 'agent', the default key files of ~/.ssh which load without passphrase for 'publickey'
+        if method == 'agent':
+            yield from paramiko.Agent().get_keys()
+            return
+        for key_class, file_name in ((paramiko.RSAKey, 'id_rsa'), (paramiko.ECDSAKey, 'id_ecdsa'), (paramiko.Ed25519Key, 'id_ed25519')):
+            key_file_path = Path('~/.ssh').expanduser() / file_name
+            if key_file_path.exists():
+                try:
+                    yield key_class.from_private_key_file(str(key_file_path))
+                except (paramiko.SSHException, OSError):
+                    continue
+
+    @classmethod_or_instancemethod
+    def _open_sftp_through_agent(cls, timeout_seconds: typing.Optional[float] = None,\
+            connection: typing.Optional[_AgentConnection] = None) -> paramiko.SFTPClient:
+        """
+        Ask the connection agent at agent_socket_path for an SFTP channel to the host of cls. The agent answers the
+        request line and then relays the Unix socket to a new SFTP channel over its warm transport, so the returned
+        client runs directly over the socket. Channels opened for the pool of a client pass its connection, so they
+        share its metadata cache, metrics, journal and upload checksums.
+        """
+        sock = _AgentSocket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connection = connection if connection is not None else _AgentConnection()
+        try:
+            sock.settimeout(timeout_seconds)
+            sock.connect(str(Path(cls.agent_socket_path).expanduser()))
+            request = {'hostname': cls.hostname, 'port': cls.port, 'username': cls.username, 'password': cls.password,\
+                       'auth_methods': cls.auth_methods, 'timeout_seconds': timeout_seconds}
+            sock.sendall(json.dumps(request).encode() + b'\n')
+            reply = b''
+            while not reply.endswith(b'\n'):
+                received = sock.recv(1)
+                if not received:
+                    raise ConnectionResetError("The connection agent closed the connection without a reply.")
+                reply += received
+            reply = json.loads(reply)
+            if not reply['ok']:
+                if reply.get('authentication_failed'):
+                    raise paramiko.AuthenticationException(reply['error'])
+                raise paramiko.SSHException(reply['error'])
+            sock.settimeout(None)
+            return paramiko.SFTPClient(sock)
+        except BaseException:
+            sock.close()
+            raise
+
+    @classmethod_or_instancemethod
+    def disconnect_from_sftp(cls, sftp: paramiko.SFTPClient) -> None:
+        """
+        Close sftp together with its SSH connection. A connection from the connection agent only closes the relayed
+        channel and the agent keeps the SSH connection warm for the next client.
+        """
+        channel = sftp.get_channel()
+        sftp.close()
+        if isinstance(channel, paramiko.Channel):
+            channel.get_transport().close()
+
+    @classmethod_or_instancemethod
+    def open_sftp_channel_pool(cls, sftp: paramiko.SFTPClient, number_of_channels: int,\
+            logger: Union[None, logging.Logger] = None) -> List[paramiko.SFTPClient]:
+        """
+        Open a pool of SFTP channels multiplexed over the already authenticated transport of sftp.
+
+        Args:
+            sftp: The connected SFTP client, it becomes the first channel of the pool.
+            number_of_channels: The total number of channels in the pool including sftp.
+            logger: Logger for logging purposes, or None if not needed.
+
+        Returns:
+            List[paramiko.SFTPClient]: sftp followed by number_of_channels - 1 newly opened SFTP clients.
+        """
+        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
+        if not isinstance(sftp, (paramiko.SFTPClient)):
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.")
+
+        if not isinstance(number_of_channels, int) or number_of_channels < 1:
+            raise ValueError("The 'number_of_channels' parameter must be a positive int.")
+
+        if not isinstance(logger, (logging.Logger, type(None))):
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
+
+        channel = sftp.get_channel()
+        sftp_pool = [sftp]
+        try:
+            for _ in range(number_of_channels - 1):
+                if isinstance(channel, paramiko.Channel):
+                    sftp_pool.append(paramiko.SFTPClient.from_transport(channel.get_transport()))
+                else:
+                    # sftp is relayed by the connection agent, which opens the further channels over its transport
+                    sftp_pool.append(cls._open_sftp_through_agent(connection=cls._connection_key(sftp)))
+        except (paramiko.SSHException, OSError) as e:
+            if logger:
+                logger.error(f"Failed to open SFTP channel {len(sftp_pool)} of {number_of_channels}: {str(e)}")
+            for channel in sftp_pool[1:]:
+                channel.close()
+            raise
+        if logger:
+            peer = channel.get_transport().getpeername()[0] if isinstance(channel, paramiko.Channel) else cls.hostname
+            logger.info(f"Opened a pool of {number_of_channels} SFTP channels to {peer}")
+        return sftp_pool
+
+    @classmethod_or_instancemethod
+    def enable_metadata_cache(cls, sftp: paramiko.SFTPClient, max_entries: int = 100000, ttl_seconds: float = 30.0) -> RemoteMetadataCache:
+        """
+        Enable the metadata cache for the SSH connection of sftp. Every SFTP channel opened over the same transport
+        (see open_sftp_channel_pool) shares the cache. Calling it again returns the already enabled cache.
+
+        Args:
+            sftp: The SFTP client providing connection to the remote host.
+            max_entries: The maximum number of cached stat/lstat results, negative lookups and listings.
+            ttl_seconds: The number of seconds a cached entry stays valid.
+
+        Returns:
+            RemoteMetadataCache: The cache of the connection, its statistics() reports hits and misses.
+        """
+        if not isinstance(sftp, (paramiko.SFTPClient)):
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.")
+        key = cls._connection_key(sftp)
+        if key not in cls._metadata_caches:
+            cls._metadata_caches[key] = RemoteMetadataCache(max_entries, ttl_seconds)
+        return cls._metadata_caches[key]
+
+    @classmethod_or_instancemethod
+    def disable_metadata_cache(cls, sftp: paramiko.SFTPClient) -> None:
+        cls._metadata_caches.pop(cls._connection_key(sftp), None)
+
+    @classmethod_or_instancemethod
+    def get_metadata_cache(cls, sftp: paramiko.SFTPClient) -> typing.Optional[RemoteMetadataCache]:
+        return cls._metadata_caches.get(cls._connection_key(sftp))
+
+    @classmethod_or_instancemethod
+    def enable_instrumentation(cls, sftp: paramiko.SFTPClient,\
+            callback: typing.Optional[typing.Callable[[str, float, int], None]] = None) -> SFTPOperationMetrics:
+        """
+        Record count, bytes and latency of every SFTP operation RemoteFolderManager makes on the SSH connection of sftp,
+        all SFTP channels opened over the same transport share the metrics. Calling it again returns the same metrics.
+
+        Args:
+            sftp: The SFTP client providing connection to the remote host.
+            callback: Called with (operation, seconds, number_of_bytes) after every operation, or None.
+
+        Returns:
+            SFTPOperationMetrics: The metrics of the connection.
+        """
+        if not isinstance(sftp, (paramiko.SFTPClient)):
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.")
+        key = cls._connection_key(sftp)
+        if key not in cls._operation_metrics:
+            cls._operation_metrics[key] = SFTPOperationMetrics(callback)
+        return cls._operation_metrics[key]
+
+    @classmethod_or_instancemethod
+    def disable_instrumentation(cls, sftp: paramiko.SFTPClient) -> None:
+        cls._operation_metrics.pop(cls._connection_key(sftp), None)
+
+    @classmethod_or_instancemethod
+    def get_operation_metrics(cls, sftp: paramiko.SFTPClient) -> typing.Optional[SFTPOperationMetrics]:
+        return cls._operation_metrics.get(cls._connection_key(sftp))
+
+    @classmethod_or_instancemethod
+    def enable_upload_checksums(cls, sftp: paramiko.SFTPClient) -> typing.Dict[str, str]:
+        """
+        Collect the sha256 hex digest of the content of every file created with content on the SSH connection of sftp.
+        The digests are computed from the chunks while they are sent, calling it again returns the same dict.
+
+        Args:
+            sftp: The SFTP client providing connection to the remote host.
+
+        Returns:
+            dict: remote path -> sha256 hex digest, filled by every following creation.
+        """
+        if not isinstance(sftp, (paramiko.SFTPClient)):
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.")
+        return cls._upload_checksums.setdefault(cls._connection_key(sftp), {})
+
+    @classmethod_or_instancemethod
+    def disable_upload_checksums(cls, sftp: paramiko.SFTPClient) -> None:
+        cls._upload_checksums.pop(cls._connection_key(sftp), None)
+
+    @classmethod_or_instancemethod
+    def verify_uploaded_files(cls, sftp: paramiko.SFTPClient, checksums: typing.Dict[str, str],\
+            logger: Union[None, logging.Logger] = None) -> List[str]:
+        """
+        Read the given remote files back, with the reads prefetched, and compare their sha256 with the expected digests.
+
+        Args:
+            sftp: The SFTP client providing connection to the remote host.
+            checksums: remote path -> expected sha256 hex digest, as collected by enable_upload_checksums.
+            logger: Logger for logging purposes, or None if not needed.
+
+        Returns:
+            List[str]: The paths whose content differs or which can not be read, empty if all of them match.
+        """
+        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
+        if not isinstance(sftp, (paramiko.SFTPClient)):
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.")
+
+        if not isinstance(checksums, dict):
+            raise TypeError("The 'checksums' parameter must be a dict.")
+
+        if not isinstance(logger, (logging.Logger, type(None))):
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
+
+        mismatched_paths = []
+        for path, expected_checksum in checksums.items():
+            digest = hashlib.sha256()
+            try:
+                with cls._call_sftp(sftp, 'open', sftp.open, path, 'rb') as remote_file:
+                    remote_file.prefetch()
+                    for chunk in iter(lambda: remote_file.read(UPLOAD_CHUNK_SIZE), b''):
+                        digest.update(chunk)
+            except IOError as e:
+                cls._log_node_event(logger, logging.ERROR, "File cannot be read: %s - %s", path, e)
+                mismatched_paths.append(path)
+                continue
+            if digest.hexdigest() != expected_checksum:
+                cls._log_node_event(logger, logging.ERROR, "Content differs from the uploaded content: %s", path)
+                mismatched_paths.append(path)
+            else:
+                cls._log_node_event(logger, logging.INFO, "Content verified: %s", path)
+        return mismatched_paths
+
+    @classmethod_or_instancemethod
+    def _call_sftp(cls, sftp: paramiko.SFTPClient, operation: str, function: typing.Callable, *args) -> typing.Any:
+        """
+        Call function(*args), an operation of sftp, and record it in the metrics of the connection if enabled.
+        """
+        metrics = cls.get_operation_metrics(sftp)
+        if metrics is None:
+            return function(*args)
+        number_of_bytes = sum(len(arg) for arg in args if isinstance(arg, (str, bytes)))
+        started_at = time.perf_counter()
+        try:
+            result = function(*args)
+        except Exception:
+            # failed calls cost a round trip as well, a stat of a missing path is the usual case
+            metrics.record(operation, time.perf_counter() - started_at, number_of_bytes)
+            raise
+        seconds = time.perf_counter() - started_at
+        if operation == 'listdir':
+            number_of_bytes += sum(len(attr.filename) for attr in result)
+        metrics.record(operation, seconds, number_of_bytes)
+        return result
+
+    @classmethod_or_instancemethod
+    def _log_node_event(cls, logger: Union[None, logging.Logger], level: int, message: str, *args) -> None:
+        """
+        Log a message about a single folder, file or path component. Arguments are only formatted when the logger
+        would emit the message, and with log_node_events set to False only warnings and errors are logged.
+        """
+        if logger is None or (level < logging.WARNING and not cls.log_node_events):
+            return
+        if logger.isEnabledFor(level):
+            logger.log(level, message, *args)
+
+    @classmethod_or_instancemethod
+    @contextlib.contextmanager
+    def queued_logger(cls, logger: logging.Logger) -> typing.Iterator[logging.Logger]:
+        """
+        Context manager yielding a logger which only puts records on a queue. A background thread hands them to the
+        handlers logger (and its ancestors) would use, so slow terminals or log files do not block the caller.
+        All queued records are written when the context exits.
+
+        Args:
+            logger: The logger whose handlers and level are used.
+
+        Returns:
+            logging.Logger: The queue backed logger to pass as logger to the RemoteFolderManager functions.
+        """
+        if not isinstance(logger, logging.Logger):
+            raise TypeError("The 'logger' parameter must be a logging.Logger.")
+        handlers = []
+        current = logger
+        while current is not None:
+            handlers.extend(current.handlers)
+            current = current.parent if current.propagate else None
+        records = queue.SimpleQueue()
+        queued = logging.getLogger(f"{logger.name}.queued")
+        queued.handlers = [logging.handlers.QueueHandler(records)]
+        queued.propagate = False
+        queued.setLevel(logger.getEffectiveLevel())
+        listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        listener.start()
+        try:
+            yield queued
+        finally:
+            listener.stop()
+            queued.handlers = []
+
+    @classmethod_or_instancemethod
+    def _connection_key(cls, sftp: paramiko.SFTPClient):
+        channel = sftp.get_channel()
+        if isinstance(channel, paramiko.Channel):
+            return channel.get_transport()
+        # the channels of the connection agent share the _AgentConnection of the client their pool was opened for
+        return getattr(channel, 'connection', None) or sftp
+
+    @classmethod_or_instancemethod
+    def _cached_stat(cls, sftp: paramiko.SFTPClient, path: str, kind: str = 'stat') -> typing.Optional[paramiko.SFTPAttributes]:
+        """
+        stat (kind='stat') or lstat (kind='lstat') of path through the metadata cache, None if the path does not exist.
+        """
+        cache = cls.get_metadata_cache(sftp)
+        if cache is not None:
+            found, attr = cache.get(kind, path)
+            if found:
+                return attr
+        try:
+            attr = cls._call_sftp(sftp, kind, sftp.stat if kind == 'stat' else sftp.lstat, path)
+        except IOError:
+            attr = None
+        if cache is not None:
+            cache.put(kind, path, attr)
+        return attr
+
+    @classmethod_or_instancemethod
+    def _cached_listdir_attr(cls, sftp: paramiko.SFTPClient, path: str) -> List[paramiko.SFTPAttributes]:
+        """
+        listdir_attr of path through the metadata cache, the lstat of every entry is cached as well.
+        """
+        cache = cls.get_metadata_cache(sftp)
+        if cache is not None:
+            found, listing = cache.get('listdir', path)
+            if found:
+                if listing is None:
+                    raise IOError(f"No such folder: {path}")
+                return listing
+        try:
+            listing = cls._call_sftp(sftp, 'listdir', sftp.listdir_attr, path)
+        except IOError:
+            if cache is not None:
+                cache.put('listdir', path, None)
+            raise
+        if cache is not None:
+            cache.put('listdir', path, listing)
+            for attr in listing:
+                cache.put('lstat', f"{path}/{attr.filename}", attr)
+        return listing
+
+    @classmethod_or_instancemethod
+    def _record_created(cls, sftp: paramiko.SFTPClient, path: str, is_file: bool, checksum: typing.Optional[str] = None) -> None:
+        if checksum is not None:
+            checksums = cls._upload_checksums.get(cls._connection_key(sftp))
+            if checksums is not None:
+                checksums[path] = checksum
+        cache = cls.get_metadata_cache(sftp)
+        if cache is not None:
+            cache.record_created(path, is_file)
+        journal = cls._creation_journals.get(cls._connection_key(sftp))
+        if journal is not None:
+            journal.record(path)
+
+    @classmethod_or_instancemethod
+    def check_whether_base_path_exists_or_not(cls,sftp: paramiko.SFTPClient, path: Union[str, Path])->bool:
+
+        '''
+            Description:
+                This function is used to check whether the base_path in which the folder has to be created exists or not.
+            
+            Args:
+                sftp: The SFTP client providing connection to the remote host.
+                path: The base path in which the folders has to be created.
+
+            Returns:
+                bool: True if base_path is present false if base_path is not present.
+        '''
+        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
+        if not isinstance(path, (str, Path)):
+            raise TypeError("The 'path' parameter must be either a string or a Path object.")   
+        
+        if not isinstance(sftp, (paramiko.SFTPClient)):
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.") 
+        
+        return cls._cached_stat(sftp, str(path)) is not None
+        
+    @classmethod_or_instancemethod
+    def check_whether_given_folder_is_symlink(cls,sftp: paramiko.SFTPClient, path:Union[str, Path],\
+            logger: Union[None, logging.Logger] = None) -> bool:
+
+        '''
+            Description:
+                Check if the given path is a symbolic link. A path which does not exist or can not be read is not a link.
+            Args:
+                sftp: The SFTP client providing connection to the remote host.
+                path: The path in which the folders has to be checked whether its symlink folder or not.
+                logger: Logger for logging purposes, or None if not needed.
+            Returns:
+                bool: True if the folder is symlink false if not.
+        '''
+        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
+        if not isinstance(path, (str, Path)):
+            raise TypeError("The 'path' parameter must be either a string or a Path object.")   
+        
+        if not isinstance(sftp, (paramiko.SFTPClient)):
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.") 
+        
+        if not isinstance(logger, (logging.Logger, type(None))):
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
+
+        # lstat describes the link itself instead of its target, failures such as permission errors give None
+        attr = cls._cached_stat(sftp, str(path), kind='lstat')
+        if attr is None:
+            cls._log_node_event(logger, logging.INFO, "Path does not exist or cannot be read: %s", path)
+            return False
+        is_symlink = stat.S_ISLNK(attr.st_mode)
+        if is_symlink:
+            cls._log_node_event(logger, logging.INFO, "Path is a symbolic link: %s", path)
+        return is_symlink
+
+    @classmethod_or_instancemethod
+    def _create_folder_or_file(cls, sftp: paramiko.SFTPClient, path: str, node: Node,\
+            logger: Union[None, logging.Logger] = None) -> None:
+        """
+        Creates the single folder or empty file described by node at path and logs it.
+        The IOError of a failed creation is reported and raised again.
+        """
+        if node.is_file:
+            try:
+                if node.content is None:
+                    # Create an empty file
+                    cls._call_sftp(sftp, 'open', lambda file_path: sftp.file(file_path, 'w').close(), path)
+                    cls._record_created(sftp, path, is_file=True)
+                else:
+                    cls._record_created(sftp, path, is_file=True, checksum=cls._write_file(sftp, path, node))
+                cls._log_node_event(logger, logging.INFO, "Created file: %s", path)
+            except IOError as e:
+                cls._log_node_event(logger, logging.ERROR, "File cannot be created: %s - %s", path, e)
+                raise
+        else:
+            try:
+                cls._call_sftp(sftp, 'mkdir', sftp.mkdir, path)
+                cls._record_created(sftp, path, is_file=False)
+                cls._log_node_event(logger, logging.INFO, "Created folder: %s", path)
+            except IOError as e:
+                cls._log_node_event(logger, logging.ERROR, "Folder already exists or cannot be created: %s - %s", path, e)
+                raise
+
+    @classmethod_or_instancemethod
+    def _write_file(cls, sftp: paramiko.SFTPClient, path: str, node: Node) -> str:
+        """
+        Creates the file at path with the content of node and returns the sha256 hex digest of the content. The writes
+        are pipelined, every chunk is sent without waiting for the acknowledgement of the previous one and closing the
+        file waits for all of them.
+        """
+        digest = hashlib.sha256()
+        number_of_bytes = 0
+        remote_file = cls._call_sftp(sftp, 'open', sftp.open, path, 'wb')
+        started_at = time.perf_counter()
+        with remote_file:
+            remote_file.set_pipelined(True)
+            for chunk in node.iterate_content_chunks():
+                digest.update(chunk)
+                remote_file.write(chunk)
+                number_of_bytes += len(chunk)
+        metrics = cls.get_operation_metrics(sftp)
+        if metrics is not None:
+            metrics.record('write', time.perf_counter() - started_at, number_of_bytes)
+        return digest.hexdigest()
+
+    @classmethod_or_instancemethod
+    def create_folders_from_node_tree_recursively(cls, sftp: paramiko.SFTPClient, base_folder_path: Union[str, Path],\
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: Node, logger: Union[None, logging.Logger] = None) -> int:
+        """
+        Creates folders and files based on the hierarchy_of_folders_to_be_created_inside_root_folder_path structure, one node after
+        the other in pre-order. The tree is walked with an explicit stack, so the depth of the hierarchy is not limited by recursion.
+
+        Args:
+            sftp: The SFTP client providing connection to the remote host.
+            base_folder_path: The base path where folders/files will be created.
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: The hierarchical structure of folders, subfolders that are 
+            to be created inside base folder path. which is initialized using Node class. 
+            logger: Logger for logging purposes, or None if not needed.
+
+        Returns:
+            int: The total number of folders and files created.
+        """
+        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
+        if not isinstance(base_folder_path, (str, Path)):
+            raise TypeError("The 'path' parameter must be either a string or a Path object.")   
+        
+        if not isinstance(sftp, (paramiko.SFTPClient)):
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.") 
+        
+        if not isinstance(logger, (logging.Logger, type(None))):
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.") 
+        
+        if not isinstance(hierarchy_of_folders_to_be_created_inside_root_folder_path, (Node)):
+            raise TypeError("The 'hierarchy_of_folders_to_be_created_inside_root_folder_path' parameter must be a Node.") 
+        number_of_folders_and_files_created = 0
+
+        # created folders together with the children still to be created inside them, an explicit stack instead
+        # of recursion so deep hierarchies do not hit the recursion limit
+        stack = [(str(base_folder_path), Node.expand_templates([hierarchy_of_folders_to_be_created_inside_root_folder_path]))]
+        while stack:
+            parent_path, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                continue
+            path = f"{parent_path}/{child.name}"
+            cls._create_folder_or_file(sftp, path, child, logger)
+            number_of_folders_and_files_created += 1
+            if not child.is_file:
+                stack.append((path, child.iterate_children()))
+
+        return number_of_folders_and_files_created
+
+    @classmethod_or_instancemethod
+    def create_folders_from_node_tree_pipelined(cls, sftp: paramiko.SFTPClient, base_folder_path: Union[str, Path],\
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: Node, logger: Union[None, logging.Logger] = None,\
+            max_requests_in_flight: int = 64) -> int:
+        """
+        Creates folders and files based on the hierarchy_of_folders_to_be_created_inside_root_folder_path structure
+        without waiting for each reply before sending the next request. As soon as a folder is created all of its
+        children are sent, so every folder of one level and every file inside already existing folders are in flight
+        together and the creation time follows the depth of the tree instead of the number of nodes.
+
+        Args:
+            sftp: The SFTP client providing connection to the remote host.
+            base_folder_path: The base path where folders/files will be created.
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: The hierarchical structure of folders, subfolders that are
+            to be created inside base folder path. which is initialized using Node class.
+            logger: Logger for logging purposes, or None if not needed.
+            max_requests_in_flight: The maximum number of requests sent to the server whose reply has not arrived yet.
+
+        Returns:
+            int: The total number of folders and files created.
+        """
+        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
+        if not isinstance(base_folder_path, (str, Path)):
+            raise TypeError("The 'path' parameter must be either a string or a Path object.")
+
+        if not isinstance(sftp, (paramiko.SFTPClient)):
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.")
+
+        if not isinstance(logger, (logging.Logger, type(None))):
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
+
+        if not isinstance(hierarchy_of_folders_to_be_created_inside_root_folder_path, (Node)):
+            raise TypeError("The 'hierarchy_of_folders_to_be_created_inside_root_folder_path' parameter must be a Node.")
+
+        if not isinstance(max_requests_in_flight, int) or max_requests_in_flight < 1:
+            raise ValueError("The 'max_requests_in_flight' parameter must be a positive int.")
+
+        return cls._create_subtrees_pipelined(sftp, [(base_folder_path, hierarchy_of_folders_to_be_created_inside_root_folder_path)],\
+            logger, max_requests_in_flight)
+
+    @classmethod_or_instancemethod
+    def _create_subtrees_pipelined(cls, sftp: paramiko.SFTPClient, subtrees: List[typing.Tuple[Union[str, Path], Node]],\
+            logger: Union[None, logging.Logger], max_requests_in_flight: int) -> int:
+        """
+        Pipelined creation of several subtrees at once, subtrees holds (existing parent folder path, node) pairs.
+        All of them share one window of requests in flight so many small subtrees cost a few round trips in total.
+        """
+        pipeline = SFTPRequestPipeline(sftp, max_requests_in_flight, cls.get_operation_metrics(sftp))
+        number_of_folders_and_files_created = 0
+        # folders that already exist on the server together with the children still to be sent into them
+        folders_ready_for_children = [(str(parent_path), Node.expand_templates([node])) for parent_path, node in reversed(subtrees)]
+        # opened files whose content still has to be sent, they go before new children so few handles are open at once
+        uploads_sending = []
+        # request number -> (path, node) for mkdir/open requests, (path, upload) for write and close requests of files
+        # with content and (path, None) for close requests of empty files
+        requests_waiting_for_reply = {}
+        first_error = None
+
+        def close_when_written(upload):
+            if upload.writes_in_flight == 0 and upload.chunks is None and not upload.closing:
+                upload.closing = True
+                requests_waiting_for_reply[pipeline.send_close(upload.handle)] = (upload.path, upload)
+
+        def stop_upload(upload):
+            if upload.chunks is not None:
+                getattr(upload.chunks, 'close', lambda: None)()
+                upload.chunks = None
+            if upload in uploads_sending:
+                uploads_sending.remove(upload)
+            close_when_written(upload)
+
+        while True:
+            while first_error is None and pipeline.has_free_slot():
+                if uploads_sending:
+                    upload = uploads_sending[-1]
+                    try:
+                        chunk = next(upload.chunks, None)
+                    except (OSError, ValueError, TypeError) as e:
+                        cls._log_node_event(logger, logging.ERROR, "File cannot be created: %s - %s", upload.path, e)
+                        upload.failed = True
+                        first_error = e
+                        stop_upload(upload)
+                        continue
+                    if chunk is None:
+                        stop_upload(upload)
+                        continue
+                    upload.digest.update(chunk)
+                    requests_waiting_for_reply[pipeline.send_write(upload.handle, upload.offset, chunk)] = (upload.path, upload)
+                    upload.offset += len(chunk)
+                    upload.writes_in_flight += 1
+                    continue
+                if not folders_ready_for_children:
+                    break
+                parent_path, children = folders_ready_for_children[-1]
+                child = next(children, None)
+                if child is None:
+                    folders_ready_for_children.pop()
+                    continue
+                path = f"{parent_path}/{child.name}"
+                if child.is_file:
+                    requests_waiting_for_reply[pipeline.send_open_for_write(path)] = (path, child)
+                else:
+                    requests_waiting_for_reply[pipeline.send_mkdir(path)] = (path, child)
+
+            if first_error is not None:
+                # the handles of unfinished uploads are closed as soon as their writes in flight are answered
+                for upload in list(uploads_sending):
+                    upload.failed = True
+                    stop_upload(upload)
+
+            if not requests_waiting_for_reply:
+                break
+
+            num, t, msg = pipeline.next_response()
+            path, node = requests_waiting_for_reply.pop(num)
+            upload = node if isinstance(node, _PipelinedUpload) else None
+            if upload is not None and not upload.closing:
+                upload.writes_in_flight -= 1
+            try:
+                pipeline.raise_for_status(t, msg)
+            except IOError as e:
+                if node is None or upload is not None or node.is_file:
+                    cls._log_node_event(logger, logging.ERROR, "File cannot be created: %s - %s", path, e)
+                else:
+                    cls._log_node_event(logger, logging.ERROR, "Folder already exists or cannot be created: %s - %s", path, e)
+                # stop sending new work but keep collecting the replies of the requests already in flight
+                if first_error is None:
+                    first_error = e
+                if upload is not None and not upload.closing:
+                    upload.failed = True
+                    stop_upload(upload)
+                continue
+
+            if node is None:
+                continue
+            if upload is not None:
+                if not upload.closing:
+                    close_when_written(upload)
+                elif not upload.failed:
+                    # the close reply tells every write of the file was acknowledged
+                    number_of_folders_and_files_created += 1
+                    cls._record_created(sftp, path, is_file=True, checksum=upload.digest.hexdigest())
+                    cls._log_node_event(logger, logging.INFO, "Created file: %s", path)
+            elif node.is_file:
+                if t == CMD_HANDLE and node.content is not None:
+                    uploads_sending.append(_PipelinedUpload(path, msg.get_binary(), node.iterate_content_chunks()))
+                    continue
+                if t == CMD_HANDLE:
+                    requests_waiting_for_reply[pipeline.send_close(msg.get_binary())] = (path, None)
+                number_of_folders_and_files_created += 1
+                cls._record_created(sftp, path, is_file=True)
+                cls._log_node_event(logger, logging.INFO, "Created file: %s", path)
+            else:
+                number_of_folders_and_files_created += 1
+                cls._record_created(sftp, path, is_file=False)
+                cls._log_node_event(logger, logging.INFO, "Created folder: %s", path)
+                folders_ready_for_children.append((path, node.iterate_children()))
+
+        if first_error is not None:
+            raise first_error
+        return number_of_folders_and_files_created
+
+
+    @classmethod_or_instancemethod
+    def create_folders_from_node_tree_in_parallel(cls, sftp_pool: List[paramiko.SFTPClient], base_folder_path: Union[str, Path],\
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: Node, logger: Union[None, logging.Logger] = None) -> int:
+        """
+        Creates folders and files based on the hierarchy_of_folders_to_be_created_inside_root_folder_path structure
+        using one worker thread per SFTP channel of sftp_pool. Every child of a created folder becomes an independent
+        task, so siblings and independent subtrees are created on different channels at the same time. The workers
+        take their tasks from a shared depth first walk, which expands templated nodes lazily and only holds the
+        children iterators of the folders open on the way.
+        The first failure cancels the tasks which have not started yet and is raised once the running ones finished.
+
+        Args:
+            sftp_pool: The SFTP channels to work on, usually opened with open_sftp_channel_pool.
+            base_folder_path: The base path where folders/files will be created.
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: The hierarchical structure of folders, subfolders that are
+            to be created inside base folder path. which is initialized using Node class.
+            logger: Logger for logging purposes, or None if not needed.
+
+        Returns:
+            int: The total number of folders and files created.
+        """
+        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
+        if not isinstance(base_folder_path, (str, Path)):
+            raise TypeError("The 'path' parameter must be either a string or a Path object.")
+
+        if not isinstance(sftp_pool, (list, tuple)) or not sftp_pool or\
+                not all(isinstance(sftp, paramiko.SFTPClient) for sftp in sftp_pool):
+            raise TypeError("The 'sftp_pool' parameter must be a non empty list of paramiko.SFTPClient.")
+
+        if not isinstance(logger, (logging.Logger, type(None))):
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
+
+        if not isinstance(hierarchy_of_folders_to_be_created_inside_root_folder_path, (Node)):
+            raise TypeError("The 'hierarchy_of_folders_to_be_created_inside_root_folder_path' parameter must be a Node.")
+
+        # (parent folder path, iterator of its children) of existing folders, taken from the top so the walk is depth
+        # first and only the folders open on the path of the workers are held, never a whole level of the hierarchy
+        pending = [(str(base_folder_path), Node.expand_templates([hierarchy_of_folders_to_be_created_inside_root_folder_path]))]
+        condition = threading.Condition()
+        number_of_busy_workers = 0
+        cancelled = threading.Event()
+        number_created_per_channel = [0] * len(sftp_pool)
+        errors = []
+
+        def take_task() -> typing.Optional[typing.Tuple[str, Node]]:
+            # the next (parent path, node) to create, None once everything is created or the work is cancelled
+            nonlocal number_of_busy_workers
+            with condition:
+                while not cancelled.is_set():
+                    while pending:
+                        parent_path, children = pending[-1]
+                        node = next(children, None)
+                        if node is None:
+                            pending.pop()
+                            continue
+                        number_of_busy_workers += 1
+                        return parent_path, node
+                    if number_of_busy_workers == 0:
+                        return None
+                    # a busy worker may still add the children of the folder it creates
+                    condition.wait()
+                return None
+
+        def finish_task(path: str, node: typing.Optional[Node]) -> None:
+            nonlocal number_of_busy_workers
+            with condition:
+                number_of_busy_workers -= 1
+                if node is not None and not node.is_file and node.has_children():
+                    pending.append((path, node.iterate_children()))
+                condition.notify_all()
+
+        def worker(channel_index: int, sftp: paramiko.SFTPClient) -> None:
+            while True:
+                task = take_task()
+                if task is None:
+                    return
+                parent_path, node = task
+                path = f"{parent_path}/{node.name}"
+                try:
+                    cls._create_folder_or_file(sftp, path, node, logger)
+                except Exception as e:
+                    with condition:
+                        errors.append(e)
+                    cancelled.set()
+                    finish_task(path, None)
+                    continue
+                number_created_per_channel[channel_index] += 1
+                finish_task(path, node)
+
+        workers = [threading.Thread(target=worker, args=(channel_index, sftp), daemon=True)
+                   for channel_index, sftp in enumerate(sftp_pool)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        return sum(number_created_per_channel)
+
+    @classmethod_or_instancemethod
+    def create_folders_from_node_tree_using_exec(cls, sftp: paramiko.SFTPClient, base_folder_path: Union[str, Path],\
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: Node, logger: Union[None, logging.Logger] = None,\
+            max_requests_in_flight: int = 64) -> int:
+        """
+        Creates folders and files based on the hierarchy_of_folders_to_be_created_inside_root_folder_path structure in one
+        round trip. The whole tree is streamed as a tar archive into `tar -x -v` running on the server over an SSH exec
+        channel and the list of extracted entries printed by tar is read back as the per entry result report.
+        When the server refuses exec or has no tar, nothing is created that way and the tree is created with
+        create_folders_from_node_tree_pipelined instead.
+
         Args:
+            sftp: The SFTP client providing connection to the remote host.
+            base_folder_path: The base path where folders/files will be created.
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: The hierarchical structure of folders, subfolders that are
+            to be created inside base folder path. which is initialized using Node class.
             logger: Logger for logging purposes, or None if not needed.
+            max_requests_in_flight: The window of the pipelined SFTP fallback.
 
         Returns:
-            paramiko.SFTPClient: The connected SFTP client.
-        
+            int: The total number of folders and files created.
         """
         #check instances of datatyes of parametres and raise TypeError if there is a mismatch
-        if not isinstance(cls.hostname, (str)):
-            raise TypeError("The 'hostname' parameter must be a string.")   
-        
-        if not isinstance(cls.username, (str)):
-            raise TypeError("The 'username' parameter must be a string.")    
-        
-        if not isinstance(cls.port, (int)):
-            raise TypeError("The 'port' parameter must be a int.") 
-        
+        if not isinstance(base_folder_path, (str, Path)):
+            raise TypeError("The 'path' parameter must be either a string or a Path object.")
+
+        if not isinstance(sftp, (paramiko.SFTPClient)):
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.")
+
         if not isinstance(logger, (logging.Logger, type(None))):
             raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
-        try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(cls.hostname, username=cls.username, password=cls.password, port=cls.port)
-            sftp = ssh.open_sftp()
-            if logger:
-                logger.info(f"Successfully connected to {cls.hostname}")
-            return sftp
-        except paramiko.AuthenticationException:
+
+        if not isinstance(hierarchy_of_folders_to_be_created_inside_root_folder_path, (Node)):
+            raise TypeError("The 'hierarchy_of_folders_to_be_created_inside_root_folder_path' parameter must be a Node.")
+
+        def fall_back_to_sftp(reason: str) -> int:
             if logger:
-                logger.error(f"Authentication failed when connecting to {cls.hostname}")
-            raise
+                logger.warning(f"Creating {base_folder_path} over SFTP, exec is not available: {reason}")
+            return cls.create_folders_from_node_tree_pipelined(sftp, base_folder_path,\
+                hierarchy_of_folders_to_be_created_inside_root_folder_path, logger, max_requests_in_flight)
+
+        channel = sftp.get_channel()
+        if not isinstance(channel, paramiko.Channel) or channel.get_transport() is None:
+            return fall_back_to_sftp("the SFTP client has no SSH transport")
+
+        # tar reuses existing folders, the serial path fails on the first existing item which is always a top node
+        for node in Node.expand_templates([hierarchy_of_folders_to_be_created_inside_root_folder_path]):
+            path = f"{base_folder_path}/{node.name}"
+            if cls.check_whether_base_path_exists_or_not(sftp, path):
+                cls._log_node_event(logger, logging.ERROR, "File cannot be created: %s" if node.is_file\
+                    else "Folder already exists or cannot be created: %s", path)
+                raise IOError(f"{path} already exists")
+
+        try:
+            # contents given as iterators can only be read once, so tar has to be known to run before anything is
+            # read for the archive and the SFTP fallback still gets every content
+            probe_channel = channel.get_transport().open_session()
+            probe_channel.exec_command("command -v tar")
+            probe_channel.shutdown_write()
+            probe_status = probe_channel.recv_exit_status()
+            probe_channel.close()
+            if probe_status != 0:
+                return fall_back_to_sftp(f"tar is not available (exit status {probe_status})")
+            exec_channel = channel.get_transport().open_session()
+            exec_channel.exec_command(f"tar -x -v -f - -C {shlex.quote(str(base_folder_path))}")
         except paramiko.SSHException as e:
+            return fall_back_to_sftp(str(e))
+
+        # tar reports every extracted entry on stdout, read it while the archive is still being sent so a full
+        # window of output can not block the server
+        reported_entries = []
+        errors_reported = []
+        def read_report(stream, lines):
+            for line in stream:
+                lines.append(line.rstrip('\n'))
+        readers = [threading.Thread(target=read_report, args=(exec_channel.makefile('r'), reported_entries), daemon=True),
+                   threading.Thread(target=read_report, args=(exec_channel.makefile_stderr('r'), errors_reported), daemon=True)]
+        for reader in readers:
+            reader.start()
+
+        number_of_bytes_sent = 0
+        # (name inside the archive, is_file, sha256 of the content or None) of every entry sent
+        entries_sent = []
+        # True once the content of a file was read from an iterator, which can not be read again for a fallback
+        iterator_content_read = False
+        started_at = time.perf_counter()
+        stream = exec_channel.makefile('wb')
+        try:
+            with tarfile.open(fileobj=stream, mode='w|', format=tarfile.PAX_FORMAT) as archive:
+                modification_time = time.time()
+                for root in Node.expand_templates([hierarchy_of_folders_to_be_created_inside_root_folder_path]):
+                    paths_per_level = []
+                    for level, node in root.iterate_pre_order():
+                        del paths_per_level[level:]
+                        paths_per_level.append(node.name)
+                        entry = tarfile.TarInfo('/'.join(paths_per_level))
+                        entry.mtime = modification_time
+                        if node.is_file:
+                            entry.type = tarfile.REGTYPE
+                            # tar run as root keeps the modes of the archive instead of applying the umask, these are
+                            # the modes the SFTP engines get with the usual umask 022
+                            entry.mode = 0o644
+                            checksum = None
+                            if node.content is None:
+                                archive.addfile(entry, io.BytesIO(b''))
+                            else:
+                                iterator_content_read |= node.has_one_shot_content()
+                                content_reader = _ContentReader(node)
+                                entry.size = content_reader.size
+                                archive.addfile(entry, content_reader)
+                                checksum = content_reader.digest.hexdigest()
+                            entries_sent.append((entry.name, True, checksum))
+                        else:
+                            entry.type = tarfile.DIRTYPE
+                            entry.mode = 0o755
+                            archive.addfile(entry)
+                            entries_sent.append((entry.name, False, None))
+                number_of_bytes_sent = archive.offset
+            stream.flush()
+        except (OSError, EOFError, paramiko.SSHException) as e:
+            # the server closed the channel before reading the whole archive, its exit status tells why
             if logger:
-                logger.error(f"Failed to establish an SSH connection: {str(e)}")
-            raise
+                logger.error("Sending the archive to %s stopped: %s", base_folder_path, e)
+        exec_channel.shutdown_write()
+        exit_status = exec_channel.recv_exit_status()
+        for reader in readers:
+            reader.join()
+        exec_channel.close()
+        metrics = cls.get_operation_metrics(sftp)
+        if metrics is not None:
+            metrics.record('exec', time.perf_counter() - started_at, number_of_bytes_sent)
 
+        if exit_status in (126, 127) and not reported_entries and not iterator_content_read:
+            return fall_back_to_sftp(f"tar could not be run (exit status {exit_status}) {' '.join(errors_reported)}")
 
-    @classmethod
-    def check_whether_base_path_exists_or_not(cls,sftp: paramiko.SFTPClient, path: Union[str, Path])->bool:
+        # the created paths come from the archive, tar reports names escaped (a\\b for a\b) and is only used to
+        # tell which entries were extracted before it failed
+        if exit_status == 0:
+            entries_created = entries_sent
+        else:
+            reported_entries = set(reported_entries)
+            entries_created = [(name, is_file, checksum) for name, is_file, checksum in entries_sent\
+                if _escape_like_tar(name) + ('' if is_file else '/') in reported_entries]
+        for name, is_file, checksum in entries_created:
+            path = f"{base_folder_path}/{name}"
+            cls._record_created(sftp, path, is_file=is_file, checksum=checksum)
+            cls._log_node_event(logger, logging.INFO, "Created file: %s" if is_file else "Created folder: %s", path)
 
-        '''
-            Description:
-                This function is used to check whether the base_path in which the folder has to be created exists or not.
-            
-            Args:
-                sftp: The SFTP client providing connection to the remote host.
-                path: The base path in which the folders has to be created.
+        if exit_status != 0:
+            message = f"Remote tar failed with exit status {exit_status} in {base_folder_path}: {' '.join(errors_reported)}"
+            if logger:
+                logger.error(message)
+            raise IOError(message)
+        return len(entries_sent)
 
-            Returns:
-                bool: True if base_path is present false if base_path is not present.
-        '''
-        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
-        if not isinstance(path, (str, Path)):
-            raise TypeError("The 'path' parameter must be either a string or a Path object.")   
-        
-        if not isinstance(sftp, (paramiko.SFTPClient)):
-            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.") 
-        
-        try:
-            sftp.stat(str(path))
-            return True
-        except IOError:
-            return False
-        
-    @classmethod
-    def check_whether_given_folder_is_symlink(cls,sftp: paramiko.SFTPClient, path:Union[str, Path]) -> bool:
+    @classmethod_or_instancemethod
+    def _compare_node_tree_with_remote(cls, sftp: paramiko.SFTPClient, base_folder_path: Union[str, Path],\
+            node: Node) -> typing.Iterator[typing.Tuple[str, str, Node]]:
+        """
+        Yields (status, path, node) for every node of the structure whose parent folder exists on the server, where
+        status is one of ITEM_PRESENT, ITEM_MISSING, ITEM_NOT_A_FOLDER and ITEM_NOT_A_FILE. Children of missing or
+        conflicting nodes are not visited. Each existing folder with children is listed once with listdir_attr, folders
+        with at most MAXIMUM_CHILDREN_CHECKED_WITH_STAT children are cheaper to check with one stat per child since a
+        listing takes at least three requests (open, read, close).
+        """
+        return cls._compare_children_with_remote(sftp, base_folder_path, Node.expand_templates([node]))
 
-        '''
-            Description:
-                Check if the given path is a symbolic link.
-            Args:
-                sftp: The SFTP client providing connection to the remote host.
-                path: The path in which the folders has to be checked whether its symlink folder or not.
-            Returns:
-                bool: True if the folder is symlink false if not.
-        '''
+    @classmethod_or_instancemethod
+    def _compare_children_with_remote(cls, sftp: paramiko.SFTPClient, folder_path: Union[str, Path],\
+            children: typing.Iterable[Node]) -> typing.Iterator[typing.Tuple[str, str, Node]]:
+        """
+        Like _compare_node_tree_with_remote for several sibling nodes below the existing folder folder_path.
+        """
+        # existing folders whose children still have to be checked
+        stack = [(str(folder_path), iter(children))]
+        while stack:
+            folder_path, children = stack.pop()
+            first_children = list(itertools.islice(children, MAXIMUM_CHILDREN_CHECKED_WITH_STAT + 1))
+            if len(first_children) > MAXIMUM_CHILDREN_CHECKED_WITH_STAT:
+                try:
+                    attributes_by_name = {attr.filename: attr for attr in cls._cached_listdir_attr(sftp, folder_path)}
+                except IOError:
+                    attributes_by_name = {}
+            else:
+                attributes_by_name = None
+
+            folders_to_list = []
+            for child in itertools.chain(first_children, children):
+                path = f"{folder_path}/{child.name}"
+                if attributes_by_name is None:
+                    attr = cls._cached_stat(sftp, path, kind='lstat')
+                else:
+                    attr = attributes_by_name.get(child.name)
+                if attr is not None and stat.S_ISLNK(attr.st_mode):
+                    # listings describe the link itself, follow it like a stat of the path would
+                    attr = cls._cached_stat(sftp, path)
+                if attr is None:
+                    yield ITEM_MISSING, path, child
+                elif child.is_file and stat.S_ISDIR(attr.st_mode):
+                    yield ITEM_NOT_A_FILE, path, child
+                elif not child.is_file and not stat.S_ISDIR(attr.st_mode):
+                    yield ITEM_NOT_A_FOLDER, path, child
+                else:
+                    yield ITEM_PRESENT, path, child
+                    if not child.is_file and child.has_children():
+                        folders_to_list.append((path, child.iterate_children()))
+            # Add subfolders to the stack in reverse order for correct hierarchical order
+            stack.extend(reversed(folders_to_list))
+
+    @classmethod_or_instancemethod
+    def verify_folders_from_node_tree(cls, sftp: paramiko.SFTPClient, base_folder_path: Union[str, Path],\
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: Node, logger: Union[None, logging.Logger] = None) -> int:
+        """
+        Checks that every folder and file of the hierarchy_of_folders_to_be_created_inside_root_folder_path structure
+        is present inside base_folder_path with the right type. A folder with more than
+        MAXIMUM_CHILDREN_CHECKED_WITH_STAT children is listed once with its attributes and all of its children are
+        checked from that listing; the children of smaller folders are checked with one lstat each, which takes fewer
+        requests than a listing (open, read, close). Either way a folder costs a few requests instead of one per node.
+
+        Args:
+            sftp: The SFTP client providing connection to the remote host.
+            base_folder_path: The existing base path in which the structure has to be present.
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: The hierarchical structure of folders, subfolders that
+            have to be present inside base folder path. which is initialized using Node class.
+            logger: Logger for logging purposes, or None if not needed.
+
+        Returns:
+            int: The total number of folders and files verified.
+
+        Raises:
+            FileNotFoundError: If a folder or file is missing.
+            NotADirectoryError: If a folder of the structure is a file on the server.
+            IsADirectoryError: If a file of the structure is a folder on the server.
+        """
         #check instances of datatyes of parametres and raise TypeError if there is a mismatch
-        if not isinstance(path, (str, Path)):
-            raise TypeError("The 'path' parameter must be either a string or a Path object.")   
-        
+        if not isinstance(base_folder_path, (str, Path)):
+            raise TypeError("The 'path' parameter must be either a string or a Path object.")
+
         if not isinstance(sftp, (paramiko.SFTPClient)):
-            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.") 
-        
-        try:
-            # Try to read the symbolic link; if successful, it means the path is a symlink
-            sftp.readlink(path)
-            return True
-        except IOError:
-            # If an IOError is raised, the path is not a symlink
-            return False
-        except Exception as e:
-            # Handle other potential exceptions, like permission errors
-            print(f"Error checking symlink: {e}")
-            return False
-        
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.")
 
-    @classmethod
-    def create_folders_from_node_tree_recursively(cls, sftp: paramiko.SFTPClient, base_folder_path: Union[str, Path],\
-            hierarchy_of_folders_to_be_created_inside_root_folder_path: Node, logger: Union[None, logging.Logger] = None) -> int:
+        if not isinstance(logger, (logging.Logger, type(None))):
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
+
+        if not isinstance(hierarchy_of_folders_to_be_created_inside_root_folder_path, (Node)):
+            raise TypeError("The 'hierarchy_of_folders_to_be_created_inside_root_folder_path' parameter must be a Node.")
+
+        number_of_folders_and_files_verified = 0
+        for status, path, node in cls._compare_node_tree_with_remote(sftp, base_folder_path,\
+                hierarchy_of_folders_to_be_created_inside_root_folder_path):
+            if status == ITEM_MISSING:
+                cls._log_node_event(logger, logging.ERROR, "item missing: %s", path)
+                raise FileNotFoundError(f"item missing: {path}")
+            if status == ITEM_NOT_A_FILE:
+                cls._log_node_event(logger, logging.ERROR, "expected a file but found a folder: %s", path)
+                raise IsADirectoryError(f"expected a file but found a folder: {path}")
+            if status == ITEM_NOT_A_FOLDER:
+                cls._log_node_event(logger, logging.ERROR, "expected a folder but found a file: %s", path)
+                raise NotADirectoryError(f"expected a folder but found a file: {path}")
+            number_of_folders_and_files_verified += 1
+            cls._log_node_event(logger, logging.INFO, "Folders present inside the path: %s no further changes required.", path)
+
+        return number_of_folders_and_files_verified
+
+    @classmethod_or_instancemethod
+    def plan_reconciliation(cls, sftp: paramiko.SFTPClient, base_folder_path: Union[str, Path],\
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: Node, logger: Union[None, logging.Logger] = None,\
+            remote_index: typing.Optional['RemoteIndex'] = None) -> ReconciliationPlan:
         """
-        Recursively creates folders and files based on the hierarchy_of_folders_to_be_created_inside_root_folder_path structure.
+        Computes the differences between the hierarchy_of_folders_to_be_created_inside_root_folder_path structure and the
+        remote tree below base_folder_path without changing anything on the server.
 
         Args:
             sftp: The SFTP client providing connection to the remote host.
-            base_folder_path: The base path where folders/files will be created.
-            hierarchy_of_folders_to_be_created_inside_root_folder_path: The hierarchical structure of folders, subfolders that are 
-            to be created inside base folder path. which is initialized using Node class. 
+            base_folder_path: The base path in which the structure has to be present.
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: The hierarchical structure of folders, subfolders that
+            have to be present inside base folder path. which is initialized using Node class.
             logger: Logger for logging purposes, or None if not needed.
+            remote_index: A remote_index.RemoteIndex with a scan of base_folder_path to compare against locally instead of
+            the server. The plan is then as old as the scan; if the index does not cover the structure the server is asked.
 
         Returns:
-            int: The total number of folders and files created.
+            ReconciliationPlan: The missing folders and files, the type conflicts and the subtrees to create.
         """
         #check instances of datatyes of parametres and raise TypeError if there is a mismatch
         if not isinstance(base_folder_path, (str, Path)):
-            raise TypeError("The 'path' parameter must be either a string or a Path object.")   
-        
+            raise TypeError("The 'path' parameter must be either a string or a Path object.")
+
         if not isinstance(sftp, (paramiko.SFTPClient)):
-            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.") 
-        
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.")
+
         if not isinstance(logger, (logging.Logger, type(None))):
-            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.") 
-        
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
+
         if not isinstance(hierarchy_of_folders_to_be_created_inside_root_folder_path, (Node)):
-            raise TypeError("The 'hierarchy_of_folders_to_be_created_inside_root_folder_path' parameter must be a Node.") 
-        number_of_folders_and_files_created = 0
+            raise TypeError("The 'hierarchy_of_folders_to_be_created_inside_root_folder_path' parameter must be a Node.")
 
-        if hierarchy_of_folders_to_be_created_inside_root_folder_path.is_file:
-            # Create the file if it does not exist
-            file_path = f"{base_folder_path}/{hierarchy_of_folders_to_be_created_inside_root_folder_path.name}"
+        if remote_index is not None:
+            from remote_index import RemoteIndex
+            if not isinstance(remote_index, RemoteIndex):
+                raise TypeError("The 'remote_index' parameter must be either a RemoteIndex or a None.")
+
+        plan = ReconciliationPlan(base_folder_path)
+        differences = None
+        if remote_index is not None:
             try:
-                # Create an empty file
-                sftp.file(file_path, 'w').close()
-                number_of_folders_and_files_created += 1
-                if logger:
-                    logger.info(f"Created file: {file_path}")
-                print(f"Created file: {file_path}")
-            except IOError as e:
-                print(f"File cannot be created: {file_path}")
-                if logger:
-                    logger.error(f"File cannot be created: {file_path} - {e}")
-                raise
+                base_folder_exists = remote_index.is_regular_folder(base_folder_path)
+                if base_folder_exists:
+                    # consumed here, a structure the index does not cover falls back to the server before anything is planned
+                    differences = [(status, path, node) for status, path, node in remote_index.compare_node_tree(base_folder_path,\
+                        hierarchy_of_folders_to_be_created_inside_root_folder_path) if status != ITEM_PRESENT]
+                elif base_folder_exists is False and remote_index.exists(base_folder_path) is False:
+                    differences = False
+            except LookupError as e:
+                differences = None
+                if logger is not None:
+                    logger.warning(f"The remote index does not cover the structure, comparing with the server: {e}")
+
+        if differences is False or (differences is None and not cls.check_whether_base_path_exists_or_not(sftp, base_folder_path)):
+            plan.base_folder_missing = True
+            plan.missing_folders.append(str(base_folder_path))
+            missing_subtrees = [(str(base_folder_path), hierarchy_of_folders_to_be_created_inside_root_folder_path)]
         else:
-            # Create the directory if it does not exist
-            folder_path = f"{base_folder_path}/{hierarchy_of_folders_to_be_created_inside_root_folder_path.name}"
-            try:
-                sftp.mkdir(folder_path)
-                number_of_folders_and_files_created += 1
-                print(f"Created folder: {folder_path}")
-                if logger:
-                    logger.info(f"Created folder: {folder_path}")
-            except IOError as e:
-                print(f"Folder already exists or cannot be created: {folder_path}")
-                if logger:
-                    logger.error(f"Folder already exists or cannot be created: {folder_path} - {e}")
-                raise
+            missing_subtrees = []
+            if differences is None:
+                differences = cls._compare_node_tree_with_remote(sftp, base_folder_path,\
+                    hierarchy_of_folders_to_be_created_inside_root_folder_path)
+            for status, path, node in differences:
+                if status == ITEM_MISSING:
+                    missing_subtrees.append((path[:-len(node.name) - 1], node))
+                elif status != ITEM_PRESENT:
+                    plan.type_conflicts.append(path)
+                    cls._log_node_event(logger, logging.ERROR, "type conflict: %s is %s on the server", path,\
+                        'a folder' if status == ITEM_NOT_A_FILE else 'a file')
 
-            # Recursively create subfolders
-            for subfolder in hierarchy_of_folders_to_be_created_inside_root_folder_path.subfolders:
-                number_of_folders_and_files_created += cls.create_folders_from_node_tree_recursively(
-                    sftp, folder_path, subfolder, logger
-                )
-        
-        return number_of_folders_and_files_created
+        plan.subtrees_to_create = missing_subtrees
+        # a templated root of a missing base folder stands for all of its generated nodes
+        for parent_path, node in ((parent_path, node) for parent_path, subtree in missing_subtrees\
+                for node in Node.expand_templates([subtree])):
+            paths_per_level = [parent_path]
+            for level, current_node in node.iterate_pre_order(1):
+                del paths_per_level[level:]
+                path = f"{paths_per_level[-1]}/{current_node.name}"
+                paths_per_level.append(path)
+                if current_node.is_file:
+                    plan.missing_files.append(path)
+                else:
+                    plan.missing_folders.append(path)
+
+        if logger is not None:
+            logger.info(f"Reconciliation of {base_folder_path}: {len(plan.missing_folders)} missing folders, "
+                        f"{len(plan.missing_files)} missing files, {len(plan.type_conflicts)} type conflicts")
+        return plan
 
+    @classmethod_or_instancemethod
+    def reconcile_folder_path(cls, base_folder_path: Union[str, Path], sftp: paramiko.SFTPClient, logger: Union[None, logging.Logger]=None,\
+            dry_run: bool = False, pipelined: bool = True, max_requests_in_flight: int = 64,\
+            remote_index: typing.Optional['RemoteIndex'] = None) -> ReconciliationPlan:
 
-    @classmethod
-    def create_folder_path_recursively(cls,base_folder_path: Union[str, Path],sftp: paramiko.SFTPClient,logger: Union[None, logging.Logger]=None) -> int:
+        '''
+            Description:
+                This function brings the remote tree below base_folder_path in line with the structure set in
+                hierarchy_of_folders_to_be_created_inside_root_folder_path. Only the missing folders and files are created,
+                items which are already present are left untouched.
+
+            Args:
+                base_folder_path: The path in which the folders has to be present.
+                sftp: The SFTP client providing connection to the remote host.
+                logger: logging.Logger if logging is wished 'None' otherwise.
+                dry_run: True to only compute and return the plan without creating anything.
+                pipelined: True to send the creation requests of all missing subtrees without waiting for each reply.
+                max_requests_in_flight: The maximum number of unanswered requests when pipelined is True.
+                remote_index: A remote_index.RemoteIndex to plan from locally (see plan_reconciliation).
+
+            Returns:
+                ReconciliationPlan: The computed plan, number_of_folders_and_files_created holds the number of created items.
+
+            Raises:
+                FileExistsError: If the plan has type conflicts, nothing is created in that case.
+        '''
+        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
+        if not isinstance(cls.hierarchy_of_folders_to_be_created_inside_root_folder_path, (Node)):
+            raise TypeError("The 'hierarchy_of_folders_to_be_created_inside_root_folder_path' parameter must be a Node.")
+
+        plan = cls.plan_reconciliation(sftp, base_folder_path, cls.hierarchy_of_folders_to_be_created_inside_root_folder_path, logger,\
+            remote_index)
+        if dry_run:
+            return plan
+        if plan.type_conflicts:
+            raise FileExistsError(f"{len(plan.type_conflicts)} items have a different type on the server, "
+                                  f"first conflict: {plan.type_conflicts[0]}")
+
+        if plan.base_folder_missing:
+            cls._call_sftp(sftp, 'mkdir', sftp.mkdir, str(base_folder_path))
+            cls._record_created(sftp, str(base_folder_path), is_file=False)
+            plan.number_of_folders_and_files_created += 1
+            if logger is not None:
+                logger.info(f"Created base folder: {base_folder_path}")
+        if pipelined:
+            plan.number_of_folders_and_files_created += cls._create_subtrees_pipelined(sftp, plan.subtrees_to_create,\
+                logger, max_requests_in_flight)
+        else:
+            for parent_path, node in plan.subtrees_to_create:
+                plan.number_of_folders_and_files_created += cls.create_folders_from_node_tree_recursively(sftp, parent_path,\
+                    node, logger)
+        return plan
+
+    @classmethod_or_instancemethod
+    def create_folder_path_recursively(cls,base_folder_path: Union[str, Path],sftp: paramiko.SFTPClient,logger: Union[None, logging.Logger]=None,\
+            pipelined: bool = False, max_requests_in_flight: int = 64, number_of_parallel_channels: int = 1,\
+            use_exec: bool = False, journal_folder_path: Union[None, str, Path] = None, journal_batch_size: int = 1000) -> int:
 
         '''
             Description:
@@ -242,6 +2455,19 @@ class RemoteFolderManager:
                 base_folder_path: The path in which the folders has to be created.
                 sftp: The SFTP client providing connection to the remote host.
                 logger: logging.Logger if logging is wished 'None' otherwise.
+                pipelined: True to send the creation requests without waiting for each reply (see
+                create_folders_from_node_tree_pipelined), False to create one node at a time.
+                max_requests_in_flight: The maximum number of unanswered requests when pipelined is True.
+                number_of_parallel_channels: When greater than 1 the tree is created by that many worker threads, each on
+                its own SFTP channel opened over the transport of sftp (see create_folders_from_node_tree_in_parallel).
+                use_exec: True to create the whole tree in one round trip with tar over an SSH exec channel, falling back
+                to SFTP when exec is not allowed (see create_folders_from_node_tree_using_exec).
+                journal_folder_path: Folder of a local journal (see CreationJournal) of the completed creations. When a
+                journal of an interrupted run with the same host, base path and structure is found, the journaled part
+                is skipped without any request and only the rest is created with the engine selected by the other
+                parameters. The journal is deleted once the creation is complete, or when a run fails before creating
+                anything. An existing base folder without a journal is verified as usual and no journal is written.
+                journal_batch_size: The number of journal entries written with one fsync.
 
             Returns:
                 number_of_files_created: Returns the total number of folders created along with the base folder if one is created.
@@ -259,6 +2485,38 @@ class RemoteFolderManager:
         if not isinstance(cls.hierarchy_of_folders_to_be_created_inside_root_folder_path, (Node)):
             raise TypeError("The 'hierarchy_of_folders_to_be_created_inside_root_folder_path' parameter must be a Node.") 
         
+        if journal_folder_path is not None:
+            if not isinstance(journal_folder_path, (str, Path)):
+                raise TypeError("The 'journal_folder_path' parameter must be either a string, a Path object or None.")
+            journal = CreationJournal(CreationJournal.journal_file_path_for(journal_folder_path, cls.hostname, cls.port,\
+                str(base_folder_path), cls.hierarchy_of_folders_to_be_created_inside_root_folder_path), base_folder_path,\
+                journal_batch_size)
+            # an existing base without a journal is only verified, exactly as without journal_folder_path
+            if not journal.journal_file_path.exists() and cls.check_whether_base_path_exists_or_not(sftp, base_folder_path):
+                return cls.create_folder_path_recursively(base_folder_path, sftp, logger, pipelined,\
+                    max_requests_in_flight, number_of_parallel_channels, use_exec)
+            resuming = journal.open()
+            cls._creation_journals[cls._connection_key(sftp)] = journal
+            try:
+                if resuming:
+                    number_of_files_created = cls._resume_creation_from_journal(sftp, base_folder_path,\
+                        cls.hierarchy_of_folders_to_be_created_inside_root_folder_path, journal, logger, pipelined,\
+                        max_requests_in_flight, number_of_parallel_channels, use_exec)
+                else:
+                    number_of_files_created = cls.create_folder_path_recursively(base_folder_path, sftp, logger, pipelined,\
+                        max_requests_in_flight, number_of_parallel_channels, use_exec)
+            except BaseException:
+                cls._creation_journals.pop(cls._connection_key(sftp), None)
+                # a run which failed before completing anything leaves nothing to resume from
+                if journal.is_empty():
+                    journal.remove()
+                else:
+                    journal.close()
+                raise
+            cls._creation_journals.pop(cls._connection_key(sftp), None)
+            journal.remove()
+            return number_of_files_created
+
         main_folder_created = 0
         #function initialization logger
         if logger is not None:
@@ -268,12 +2526,36 @@ class RemoteFolderManager:
         if not cls.check_whether_base_path_exists_or_not(sftp, base_folder_path):
             try:
                 main_folder_created += 1
-                sftp.mkdir(str(base_folder_path))
+                cls._call_sftp(sftp, 'mkdir', sftp.mkdir, str(base_folder_path))
+                cls._record_created(sftp, str(base_folder_path), is_file=False)
                 if logger is not None:
                     logging.info(f"Created base folder: {base_folder_path}")
-                internal_folders = cls.create_folders_from_node_tree_recursively(sftp, base_folder_path,\
+                if use_exec:
+                    internal_folders = cls.create_folders_from_node_tree_using_exec(sftp, base_folder_path,\
+                                        cls.hierarchy_of_folders_to_be_created_inside_root_folder_path,logger,\
+                                        max_requests_in_flight)
+                elif number_of_parallel_channels > 1:
+                    sftp_pool = cls.open_sftp_channel_pool(sftp, number_of_parallel_channels, logger)
+                    try:
+                        internal_folders = cls.create_folders_from_node_tree_in_parallel(sftp_pool, base_folder_path,\
+                                            cls.hierarchy_of_folders_to_be_created_inside_root_folder_path,logger)
+                    finally:
+                        for channel in sftp_pool[1:]:
+                            channel.close()
+                elif pipelined:
+                    internal_folders = cls.create_folders_from_node_tree_pipelined(sftp, base_folder_path,\
+                                        cls.hierarchy_of_folders_to_be_created_inside_root_folder_path,logger,\
+                                        max_requests_in_flight)
+                else:
+                    internal_folders = cls.create_folders_from_node_tree_recursively(sftp, base_folder_path,\
                                         cls.hierarchy_of_folders_to_be_created_inside_root_folder_path,logger)
                 number_of_files_created = internal_folders+main_folder_created
+                # the summary is logged even when log_node_events is False
+                if logger is not None:
+                    logger.info("Created %d folders and files below %s", number_of_files_created, base_folder_path)
+                    metrics = cls.get_operation_metrics(sftp)
+                    if metrics is not None:
+                        logger.info("SFTP operations of %s:\n%s", base_folder_path, metrics)
                 return number_of_files_created
             except IOError as e:
                 if logger is not None:
@@ -283,22 +2565,91 @@ class RemoteFolderManager:
         else:
             if logger is not None:
                 logging.info(f"Base folder {base_folder_path} already exists.")
-            stack = [(base_folder_path, cls.hierarchy_of_folders_to_be_created_inside_root_folder_path)]
-            while stack:
-                current_path, current_node = stack.pop()
-                base_folder_path = f"{current_path}/{current_node.name}"
+            cls.verify_folders_from_node_tree(sftp, base_folder_path,\
+                cls.hierarchy_of_folders_to_be_created_inside_root_folder_path, logger)
+            return 0
+    
+    @classmethod_or_instancemethod
+    def _resume_creation_from_journal(cls, sftp: paramiko.SFTPClient, base_folder_path: Union[str, Path],\
+            hierarchy_of_folders_to_be_created_inside_root_folder_path: Node, journal: CreationJournal,\
+            logger: Union[None, logging.Logger], pipelined: bool, max_requests_in_flight: int,\
+            number_of_parallel_channels: int = 1, use_exec: bool = False) -> int:
+        """
+        Continue an interrupted journaled creation. The journaled part of the structure is walked locally without any
+        request. Children of journaled folders which are not journaled themselves are compared with the server, since
+        the last batch may have been created without reaching the journal, and only the missing subtrees are created,
+        with the same choice of engine as create_folder_path_recursively.
+
+        Returns:
+            int: The number of folders and files created by this run.
+
+        Raises:
+            FileExistsError: If an item which is not journaled has a different type on the server, nothing is
+            created in that case.
+        """
+        base_folder_path = str(base_folder_path)
+        if logger is not None:
+            logger.info("Resuming the creation of %s from %s with %d journaled entries", base_folder_path,\
+                journal.journal_file_path, len(journal.completed_paths))
+        number_of_folders_and_files_created = 0
+        if not journal.is_completed(base_folder_path) and not cls.check_whether_base_path_exists_or_not(sftp, base_folder_path):
+            cls._call_sftp(sftp, 'mkdir', sftp.mkdir, base_folder_path)
+            cls._record_created(sftp, base_folder_path, is_file=False)
+            number_of_folders_and_files_created += 1
 
-                if not cls.check_whether_base_path_exists_or_not(sftp, base_folder_path):
-                    if logger is not None:
-                        logging.error(f"item missing: {base_folder_path}")
-                    raise FileNotFoundError(f"item missing: {base_folder_path}")
+        missing_subtrees = []
+        type_conflicts = []
+        # journaled folders whose children still have to be walked
+        stack = [(base_folder_path, Node.expand_templates([hierarchy_of_folders_to_be_created_inside_root_folder_path]))]
+        while stack:
+            folder_path, children = stack.pop()
+            children_not_journaled = []
+            for child in children:
+                path = f"{folder_path}/{child.name}"
+                if not journal.is_completed(path):
+                    children_not_journaled.append(child)
+                elif not child.is_file and child.has_children():
+                    stack.append((path, child.iterate_children()))
+            if not children_not_journaled:
+                continue
+            for status, path, node in cls._compare_children_with_remote(sftp, folder_path, children_not_journaled):
+                if status == ITEM_MISSING:
+                    missing_subtrees.append((path[:-len(node.name) - 1], node))
+                elif status == ITEM_PRESENT:
+                    journal.record(path)
                 else:
-                    if logger is not None:
-                        logging.info(f"Folders present inside the path: {base_folder_path} no further changes required.")
-                # Add subfolders to the stack in reverse order for correct hierarchical order
-                stack.extend((base_folder_path, subfolder) for subfolder in reversed(current_node.subfolders))
-    
-    @classmethod
+                    type_conflicts.append(path)
+                    cls._log_node_event(logger, logging.ERROR, "type conflict: %s is %s on the server", path,\
+                        'a folder' if status == ITEM_NOT_A_FILE else 'a file')
+        if type_conflicts:
+            raise FileExistsError(f"{len(type_conflicts)} items have a different type on the server, "
+                                  f"first conflict: {type_conflicts[0]}")
+
+        if not missing_subtrees:
+            return number_of_folders_and_files_created
+        if use_exec:
+            for parent_path, node in missing_subtrees:
+                number_of_folders_and_files_created += cls.create_folders_from_node_tree_using_exec(sftp, parent_path,\
+                    node, logger, max_requests_in_flight)
+        elif number_of_parallel_channels > 1:
+            sftp_pool = cls.open_sftp_channel_pool(sftp, number_of_parallel_channels, logger)
+            try:
+                for parent_path, node in missing_subtrees:
+                    number_of_folders_and_files_created += cls.create_folders_from_node_tree_in_parallel(sftp_pool,\
+                        parent_path, node, logger)
+            finally:
+                for channel in sftp_pool[1:]:
+                    channel.close()
+        elif pipelined:
+            number_of_folders_and_files_created += cls._create_subtrees_pipelined(sftp, missing_subtrees, logger,\
+                max_requests_in_flight)
+        else:
+            for parent_path, node in missing_subtrees:
+                number_of_folders_and_files_created += cls.create_folders_from_node_tree_recursively(sftp, parent_path,\
+                    node, logger)
+        return number_of_folders_and_files_created
+
+    @classmethod_or_instancemethod
     def is_path_a_regular_folder(cls, folder_path: Union[str, Path],sftp:paramiko.SFTPClient,\
         logger: Union[None, logging.Logger]=None, description_str:str="") -> bool:
         
@@ -339,20 +2690,214 @@ class RemoteFolderManager:
         #check whether the path is folder or symlink or file and returns the bool accordingly
         for folder in path_list:
             current_path_in_server = Path(current_path_in_server) / folder
+            # one lstat tells whether the component exists, is a folder and is a symbolic link
+            attr = cls._cached_stat(sftp, str(current_path_in_server), kind='lstat')
+            if not cls._log_folder_component_check(current_path_in_server, attr, logger, description_str):
+                return False
+        return True
+
+    @classmethod_or_instancemethod
+    def _log_folder_component_check(cls, current_path_in_server: Union[str, Path], attr: typing.Optional[paramiko.SFTPAttributes],\
+            logger: Union[None, logging.Logger], description_str: str) -> bool:
+        '''
+            Description:
+                Decide from the lstat attributes of one path component (None if the lstat failed) whether it is a
+                regular folder and log the result.
+        '''
+        if attr is None or not (stat.S_ISDIR(attr.st_mode) or stat.S_ISLNK(attr.st_mode)):
+            # Log error if directory is not found
+            cls._log_node_event(logger, logging.ERROR, "%s %s neither exists nor a folder", description_str, current_path_in_server)
+            return False
+        # Log if the directory exists
+        cls._log_node_event(logger, logging.INFO, "%s %s exists", description_str, current_path_in_server)
+        if stat.S_ISLNK(attr.st_mode):
+            cls._log_node_event(logger, logging.ERROR, "%s %s is a symbolic link", description_str, current_path_in_server)
+            return False
+        return True
+
+    @classmethod_or_instancemethod
+    def are_paths_regular_folders(cls, folder_paths: typing.Iterable[Union[str, Path]], sftp: paramiko.SFTPClient,\
+        logger: Union[None, logging.Logger]=None, description_str: str="", max_requests_in_flight: int = 64) -> typing.Dict[str, bool]:
+
+        '''
+            Description:
+                Bulk variant of is_path_a_regular_folder. The paths are merged into a prefix trie below default_host_path
+                so every shared ancestor is checked only once, and the lstat requests of all components whose parent is
+                known to be a regular folder are pipelined.
+
+            Args:
+                folder_paths: The paths in which the folder existance has to be checked.
+                sftp: The SFTP client providing connection to the remote host.
+                logger: logging.Logger if logging is wished 'None' otherwise.
+                description_str: string used as a prefix for logging messages if logger:logging.Logger else none
+                max_requests_in_flight: The maximum number of unanswered lstat requests.
+
+            Returns:
+                dict: str(path) -> True if the path is a regular folder, False otherwise, for every given path.
+        '''
+        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
+        folder_paths = list(folder_paths)
+        if not all(isinstance(folder_path, (str, Path)) for folder_path in folder_paths):
+            raise TypeError("The 'folder_paths' parameter must only contain strings or Path objects.")
+
+        if not isinstance(sftp, (paramiko.SFTPClient)):
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.")
+
+        if not isinstance(logger, (logging.Logger, type(None))):
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
+
+        if not isinstance(description_str, (str)):
+            raise TypeError("The 'description_str' parameter must be a string.")
+
+        if not isinstance(max_requests_in_flight, int) or max_requests_in_flight < 1:
+            raise ValueError("The 'max_requests_in_flight' parameter must be a positive int.")
+
+        if logger is not None:
+            logger.info(description_str+f" Function to checking whether {len(folder_paths)} paths exist or not.")
+
+        # every trie node is [children by component, paths ending at this node]
+        trie = [{}, []]
+        for folder_path in folder_paths:
+            trie_node = trie
+            for part in Path(str(folder_path)).parts:
+                if part:
+                    trie_node = trie_node[0].setdefault(part, [{}, []])
+            trie_node[1].append(str(folder_path))
+
+        results = {}
+
+        def set_results_below(trie_node, value):
+            stack = [trie_node]
+            while stack:
+                current = stack.pop()
+                for path in current[1]:
+                    results[path] = value
+                stack.extend(current[0].values())
+
+        for path in trie[1]:
+            results[path] = True
+        cache = cls.get_metadata_cache(sftp)
+        pipeline = SFTPRequestPipeline(sftp, max_requests_in_flight, cls.get_operation_metrics(sftp))
+        # (path of a regular folder, iterator over its trie children still to be checked)
+        folders_ready_for_children = [(cls.default_host_path, iter(trie[0].items()))]
+
+        def handle_component(current_path_in_server, trie_node, attr):
+            if cls._log_folder_component_check(current_path_in_server, attr, logger, description_str):
+                for path in trie_node[1]:
+                    results[path] = True
+                folders_ready_for_children.append((current_path_in_server, iter(trie_node[0].items())))
+            else:
+                set_results_below(trie_node, False)
+        requests_waiting_for_reply = {}
+        while True:
+            while folders_ready_for_children and pipeline.has_free_slot():
+                parent_path, children = folders_ready_for_children[-1]
+                child = next(children, None)
+                if child is None:
+                    folders_ready_for_children.pop()
+                    continue
+                part, trie_node = child
+                current_path_in_server = Path(parent_path) / part
+                if cache is not None:
+                    found, attr = cache.get('lstat', str(current_path_in_server))
+                    if found:
+                        handle_component(current_path_in_server, trie_node, attr)
+                        continue
+                num = pipeline.send_lstat(str(current_path_in_server))
+                requests_waiting_for_reply[num] = (current_path_in_server, trie_node)
+
+            if not requests_waiting_for_reply:
+                break
+
+            num, t, msg = pipeline.next_response()
+            current_path_in_server, trie_node = requests_waiting_for_reply.pop(num)
             try:
-                # Attempt to list the contents of the current directory
-                sftp.listdir(str(current_path_in_server))
-                # Log if the directory exists
-                if logger is not None:
-                    logger.info(description_str+f" {current_path_in_server} exists")
-                # Check if it's a symbolic link
-                if cls.check_whether_given_folder_is_symlink(sftp, str(current_path_in_server)):
-                    if logger is not None:
-                        logger.error(description_str+f" {current_path_in_server} is a symbolic link")
-                    return False        
+                attr = pipeline.read_attributes(t, msg)
             except IOError:
-                # Log error if directory is not found
+                attr = None
+            if cache is not None:
+                cache.put('lstat', str(current_path_in_server), attr)
+            handle_component(current_path_in_server, trie_node, attr)
+
+        return {str(folder_path): results[str(folder_path)] for folder_path in folder_paths}
+
+    @classmethod_or_instancemethod
+    def apply_to_hosts(cls, managers: typing.Iterable[Union['RemoteFolderManager', typing.Dict[str, typing.Any]]],\
+            base_folder_path: Union[str, Path], operation: str = 'create', logger: Union[None, logging.Logger]=None,\
+            max_simultaneous_connections: int = 16, timeout_seconds: typing.Optional[float] = 30.0,\
+            on_host_done: typing.Optional[typing.Callable[[HostResult], None]] = None, **operation_options) -> List[HostResult]:
+
+        '''
+            Description:
+                Apply the folder structure to many hosts concurrently. Every host gets its own connection, at most
+                max_simultaneous_connections hosts are worked on at the same time and a failing or slow host does not
+                stop or delay the others.
+
+            Args:
+                managers: RemoteFolderManager instances, or dicts of their __init__ arguments, one per host. Values
+                    which are not given (for example the structure) fall back to the class defaults.
+                base_folder_path: The path in which the folders have to be present, relative paths are joined to the
+                    host_path of every manager.
+                operation: 'create' (create_folder_path_recursively), 'reconcile' (reconcile_folder_path) or 'verify'
+                    (verify_folders_from_node_tree).
+                logger: logging.Logger if logging is wished 'None' otherwise.
+                max_simultaneous_connections: The maximum number of hosts connected at the same time.
+                timeout_seconds: Timeout of the connect and the SSH handshake of every host.
+                on_host_done: Called with the HostResult of every host as soon as it is finished.
+                operation_options: Passed on to the operation, for example pipelined=True or dry_run=True.
+
+            Returns:
+                List[HostResult]: One result per host in the order of managers.
+        '''
+        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
+        manager_class = cls if isinstance(cls, type) else type(cls)
+        managers = [manager if isinstance(manager, RemoteFolderManager) else manager_class(**manager) for manager in managers]
+
+        if not isinstance(base_folder_path, (str, Path)):
+            raise TypeError("The 'base_folder_path' parameter must be either a string or a Path object.")
+
+        if operation not in ('create', 'reconcile', 'verify'):
+            raise ValueError("The 'operation' parameter must be 'create', 'reconcile' or 'verify'.")
+
+        if not isinstance(logger, (logging.Logger, type(None))):
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
+
+        if not isinstance(max_simultaneous_connections, int) or max_simultaneous_connections < 1:
+            raise ValueError("The 'max_simultaneous_connections' parameter must be a positive int.")
+
+        def apply_to_host(manager):
+            path = Path(str(base_folder_path))
+            if not path.is_absolute():
+                path = Path(str(manager.default_host_path)) / path
+            host_result = HostResult(manager.hostname, str(path))
+            started_at = time.perf_counter()
+            sftp = None
+            try:
+                sftp = manager.connect_to_sftp(logger, timeout_seconds)
+                host_result.connect_seconds = time.perf_counter() - started_at
+                if operation == 'create':
+                    host_result.result = manager.create_folder_path_recursively(path, sftp, logger, **operation_options)
+                elif operation == 'reconcile':
+                    host_result.result = manager.reconcile_folder_path(path, sftp, logger, **operation_options)
+                else:
+                    host_result.result = manager.verify_folders_from_node_tree(sftp, path,\
+                        manager.hierarchy_of_folders_to_be_created_inside_root_folder_path, logger)
+            except Exception as e:
+                host_result.error = e
                 if logger is not None:
-                    logger.error(description_str+f" {current_path_in_server} neither exists nor a folder")
-                return False
-        return True
\ No newline at end of file
+                    logger.error("%s failed on %s: %r", operation, manager.hostname, e)
+            finally:
+                if sftp is not None:
+                    manager.disconnect_from_sftp(sftp)
+                host_result.seconds = time.perf_counter() - started_at
+            if on_host_done is not None:
+                on_host_done(host_result)
+            return host_result
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_simultaneous_connections, len(managers) or 1)) as executor:
+            host_results = list(executor.map(apply_to_host, managers))
+        if logger is not None:
+            logger.info("%s on %d hosts: %d succeeded, %d failed", operation, len(host_results),\
+                sum(host_result.succeeded for host_result in host_results),\
+                sum(not host_result.succeeded for host_result in host_results))
+        return host_results
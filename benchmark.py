@@ -0,0 +1,618 @@
+'''
+Benchmark suite for RemoteFolderManager. A local paramiko SFTP server backed by a temporary directory is started in
+process, optionally behind a relay which adds latency and limits bandwidth, and the creation, verification and path
+check functions are run against generated Node trees of different shapes and sizes.
+
+    python benchmark.py --shapes wide balanced --sizes 1000 10000 --latency-ms 40 --save-baseline baseline.json
+    python benchmark.py --shapes wide balanced --sizes 1000 10000 --latency-ms 40 --compare-baseline baseline.json
+'''
+
+import argparse
+import collections
+import contextlib
+import json
+import os
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import heapq
+import typing
+from typing import List
+from pathlib import Path
+import paramiko
+from Plus4Data import Node, RemoteFolderManager
+
+SHAPES = ('deep', 'wide', 'balanced')
+SCENARIOS = ('create', 'create_pipelined', 'create_parallel', 'create_exec', 'verify', 'is_path_a_regular_folder',
+             'are_paths_regular_folders', 'build_from_text_spec', 'build_from_json_lines_spec', 'mirror_local_directory')
+# scenarios building the Node tree locally, without the server
+BUILDER_SCENARIOS = ('build_from_text_spec', 'build_from_json_lines_spec', 'mirror_local_directory')
+# longest chain of nested folders a generated deep tree uses, longer paths exceed PATH_MAX on the server
+MAXIMUM_CHAIN_DEPTH = 500
+
+
+class _LocalServer(paramiko.ServerInterface):
+    '''
+    Accepts the generated password of the LocalSFTPServer, sessions, the sftp subsystem and exec requests.
+    '''
+    def __init__(self, password: str, allow_exec: bool):
+        self.password = password
+        self.allow_exec = allow_exec
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if secrets.compare_digest(password, self.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        if not self.allow_exec:
+            return False
+        threading.Thread(target=_run_exec_command, args=(channel, command), daemon=True).start()
+        return True
+
+
+def _run_exec_command(channel: paramiko.Channel, command: bytes) -> None:
+    '''
+        Description:
+            Run command locally with its stdin, stdout and stderr connected to channel.
+    '''
+    process = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def copy_stdin():
+        try:
+            for data in iter(lambda: channel.recv(65536), b''):
+                process.stdin.write(data)
+        except BrokenPipeError:
+            pass
+        finally:
+            with contextlib.suppress(BrokenPipeError):
+                process.stdin.close()
+
+    def copy_stderr():
+        for data in iter(lambda: process.stderr.read1(65536), b''):
+            channel.sendall_stderr(data)
+
+    copiers = [threading.Thread(target=copy_stdin, daemon=True), threading.Thread(target=copy_stderr, daemon=True)]
+    for copier in copiers:
+        copier.start()
+    for data in iter(lambda: process.stdout.read1(65536), b''):
+        channel.sendall(data)
+    for copier in copiers:
+        copier.join()
+    channel.send_exit_status(process.wait())
+    channel.close()
+
+
+class _LocalSFTPHandle(paramiko.SFTPHandle):
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+
+class _LocalSFTPServerInterface(paramiko.SFTPServerInterface):
+    '''
+    Serves the local file system. Paths are used as they are, the benchmarks only work below the temporary directory.
+    '''
+    def _attributes(self, path, follow_symlinks=True):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(path) if follow_symlinks else os.lstat(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def _status(self, operation, *args):
+        try:
+            operation(*args)
+            return paramiko.SFTP_OK
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def list_folder(self, path):
+        try:
+            listing = []
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    attr = paramiko.SFTPAttributes.from_stat(entry.stat(follow_symlinks=False), entry.name)
+                    listing.append(attr)
+            return listing
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        return self._attributes(path)
+
+    def lstat(self, path):
+        return self._attributes(path, follow_symlinks=False)
+
+    def open(self, path, flags, attr):
+        try:
+            file_descriptor = os.open(path, flags, 0o666)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        if flags & os.O_WRONLY:
+            mode = 'ab' if flags & os.O_APPEND else 'wb'
+        elif flags & os.O_RDWR:
+            mode = 'a+b' if flags & os.O_APPEND else 'r+b'
+        else:
+            mode = 'rb'
+        handle = _LocalSFTPHandle(flags)
+        handle.filename = path
+        handle.readfile = handle.writefile = os.fdopen(file_descriptor, mode)
+        return handle
+
+    def mkdir(self, path, attr):
+        return self._status(os.mkdir, path)
+
+    def rmdir(self, path):
+        return self._status(os.rmdir, path)
+
+    def remove(self, path):
+        return self._status(os.remove, path)
+
+    def rename(self, oldpath, newpath):
+        return self._status(os.rename, oldpath, newpath)
+
+    def symlink(self, target_path, path):
+        return self._status(os.symlink, target_path, path)
+
+    def readlink(self, path):
+        try:
+            return os.readlink(path)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def canonicalize(self, path):
+        return os.path.normpath(path)
+
+
+class LatencyRelay:
+    '''
+    TCP relay between a client and a server which delays every chunk by half of round_trip_latency in each direction
+    and, if bandwidth_bytes_per_second is set, never delivers faster than that. Chunks are delivered in order and
+    independently of each other, so pipelined requests overlap like on a real link.
+    '''
+    def __init__(self, upstream_port: int, round_trip_latency: float = 0.0, bandwidth_bytes_per_second: typing.Optional[float] = None):
+        self.upstream_port = upstream_port
+        self.one_way_latency = round_trip_latency / 2
+        self.bandwidth_bytes_per_second = bandwidth_bytes_per_second
+        self._listener = socket.socket()
+        self._listener.bind(('127.0.0.1', 0))
+        self._listener.listen(64)
+        self.port = self._listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self._listener.accept()
+            except OSError:
+                return
+            server = socket.create_connection(('127.0.0.1', self.upstream_port))
+            for connection in (client, server):
+                connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._relay(client, server)
+            self._relay(server, client)
+
+    def _relay(self, source: socket.socket, destination: socket.socket) -> None:
+        chunks = []
+        condition = threading.Condition()
+
+        def receive():
+            sequence = 0
+            link_free_at = 0.0
+            while True:
+                try:
+                    data = source.recv(65536)
+                except OSError:
+                    data = b''
+                now = time.monotonic()
+                deliver_at = now + self.one_way_latency
+                if data and self.bandwidth_bytes_per_second:
+                    link_free_at = max(link_free_at, now) + len(data) / self.bandwidth_bytes_per_second
+                    deliver_at = max(deliver_at, link_free_at + self.one_way_latency)
+                with condition:
+                    heapq.heappush(chunks, (deliver_at, sequence, data))
+                    sequence += 1
+                    condition.notify()
+                if not data:
+                    return
+
+        def deliver():
+            while True:
+                with condition:
+                    while not chunks:
+                        condition.wait()
+                    deliver_at, _, data = chunks[0]
+                    delay = deliver_at - time.monotonic()
+                    if delay > 0:
+                        condition.wait(delay)
+                        continue
+                    heapq.heappop(chunks)
+                if not data:
+                    with contextlib.suppress(OSError):
+                        destination.shutdown(socket.SHUT_WR)
+                    return
+                try:
+                    destination.sendall(data)
+                except OSError:
+                    return
+
+        threading.Thread(target=receive, daemon=True).start()
+        threading.Thread(target=deliver, daemon=True).start()
+
+    def close(self):
+        self._listener.close()
+
+
+class LocalSFTPServer:
+    '''
+    In process SSH server offering the sftp subsystem and exec channels, backed by a temporary directory.
+    It listens on 127.0.0.1 only and accepts a randomly generated password.
+    '''
+    def __init__(self, round_trip_latency: float = 0.0, bandwidth_bytes_per_second: typing.Optional[float] = None,
+                 allow_exec: bool = True):
+        self.root = tempfile.mkdtemp(prefix='plus4data_benchmark_')
+        self.username = 'benchmark'
+        self.password = secrets.token_urlsafe(16)
+        self.allow_exec = allow_exec
+        self._host_key = paramiko.RSAKey.generate(2048)
+        self._listener = socket.socket()
+        self._listener.bind(('127.0.0.1', 0))
+        self._listener.listen(64)
+        self._transports = []
+        threading.Thread(target=self._accept, daemon=True).start()
+        self.relay = None
+        self.port = self._listener.getsockname()[1]
+        if round_trip_latency or bandwidth_bytes_per_second:
+            self.relay = LatencyRelay(self.port, round_trip_latency, bandwidth_bytes_per_second)
+            self.port = self.relay.port
+
+    def _accept(self):
+        while True:
+            try:
+                connection, _ = self._listener.accept()
+            except OSError:
+                return
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(connection)
+            transport.add_server_key(self._host_key)
+            transport.set_subsystem_handler('sftp', paramiko.SFTPServer, _LocalSFTPServerInterface)
+            transport.start_server(server=_LocalServer(self.password, self.allow_exec))
+            self._transports.append(transport)
+
+    def configure(self, manager=RemoteFolderManager) -> None:
+        '''
+            Description:
+                Point the connection settings of RemoteFolderManager at this server.
+        '''
+        manager.set_defaults(host_path=self.root, hostname='127.0.0.1', username=self.username, password=self.password,
+                             port=self.port)
+
+    def connect(self) -> paramiko.SFTPClient:
+        connection = socket.create_connection(('127.0.0.1', self.port))
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        transport = paramiko.Transport(connection)
+        transport.connect(username=self.username, password=self.password)
+        return paramiko.SFTPClient.from_transport(transport)
+
+    def close(self):
+        self._listener.close()
+        if self.relay is not None:
+            self.relay.close()
+        for transport in self._transports:
+            transport.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class RequestCounter:
+    '''
+    Counts the SFTP requests sent by every SFTP client of the process and the round trips they wait for, while it is
+    used as a context manager. A round trip is counted whenever a client has to read a reply that has not arrived
+    yet, so pipelined replies which are already buffered are free.
+    '''
+    def __init__(self):
+        self.requests = 0
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        counter = self
+        async_request = self._async_request = paramiko.SFTPClient._async_request
+        read_packet = self._read_packet = paramiko.SFTPClient._read_packet
+
+        def count_request(sftp, *args):
+            with counter._lock:
+                counter.requests += 1
+            return async_request(sftp, *args)
+
+        def count_round_trip(sftp):
+            if not sftp.sock.recv_ready():
+                with counter._lock:
+                    counter.round_trips += 1
+            return read_packet(sftp)
+
+        paramiko.SFTPClient._async_request = count_request
+        paramiko.SFTPClient._read_packet = count_round_trip
+        return self
+
+    def __exit__(self, *exc_info):
+        paramiko.SFTPClient._async_request = self._async_request
+        paramiko.SFTPClient._read_packet = self._read_packet
+
+
+def generate_tree(shape: str, number_of_nodes: int, files_per_folder: int = 0, file_size: int = 0) -> Node:
+    '''
+        Description:
+            Generate a Node tree of about number_of_nodes nodes.
+            deep: chains of nested folders of at most MAXIMUM_CHAIN_DEPTH below the root.
+            wide: one folder holding all other nodes.
+            balanced: every folder holds 10 children.
+            files_per_folder files of file_size bytes are added to every folder without children.
+
+        Returns:
+            Node: The root of the generated tree.
+    '''
+    if shape not in SHAPES:
+        raise ValueError(f"The 'shape' parameter must be one of {SHAPES}.")
+    root = Node('bench')
+    remaining = number_of_nodes - 1
+    if shape == 'deep':
+        chain_index = 0
+        while remaining > 0:
+            current = Node(f'c{chain_index}')
+            root.subfolders.append(current)
+            remaining -= 1
+            for depth in range(1, min(remaining, MAXIMUM_CHAIN_DEPTH - 1) + 1):
+                child = Node(f'd{depth}')
+                current.subfolders.append(child)
+                current = child
+                remaining -= 1
+            chain_index += 1
+    elif shape == 'wide':
+        root.subfolders.extend(Node(f'w{index}') for index in range(remaining))
+    else:
+        waiting = collections.deque([root])
+        while remaining > 0:
+            parent = waiting.popleft()
+            for index in range(min(10, remaining)):
+                child = Node(f'b{index}')
+                parent.subfolders.append(child)
+                waiting.append(child)
+                remaining -= 1
+    if files_per_folder:
+        content = os.urandom(file_size) if file_size else None
+        leaf_folders = [node for _, node in root.iterate_pre_order() if not node.is_file and not node.subfolders]
+        for node in leaf_folders:
+            node.subfolders.extend(Node(f'f{index}.txt', is_file=True, content=content) for index in range(files_per_folder))
+    return root
+
+
+def _deepest_paths(tree: Node, base_folder_path: str, number_of_paths: int) -> List[str]:
+    # the relative paths of the number_of_paths deepest folders, for the path check scenarios; files are skipped, so
+    # folders holding only files still count as the deepest ones
+    def iterate_folders() -> typing.Iterator[typing.Tuple[int, int, str]]:
+        names = []
+        for position, (level, node) in enumerate(tree.iterate_pre_order()):
+            del names[level:]
+            names.append(node.name)
+            if not node.is_file:
+                yield level, -position, '/'.join([base_folder_path] + names)
+
+    paths = [path for _, _, path in heapq.nlargest(number_of_paths, iterate_folders())]
+    assert paths, "the tree has no folder to check"
+    return paths
+
+
+def run_scenario(server: LocalSFTPServer, scenario: str, shape: str, number_of_nodes: int,
+                 max_requests_in_flight: int = 64, number_of_parallel_channels: int = 4,
+                 number_of_checked_paths: int = 100, files_per_folder: int = 0,
+                 file_size: int = 0) -> typing.Dict[str, typing.Union[str, int, float]]:
+    '''
+        Description:
+            Run one scenario on a freshly generated tree and measure it.
+
+        Returns:
+            dict: scenario, shape, nodes, wall_time_seconds, requests, round_trips and peak_memory_bytes.
+    '''
+    if scenario not in SCENARIOS:
+        raise ValueError(f"The 'scenario' parameter must be one of {SCENARIOS}.")
+    if scenario in BUILDER_SCENARIOS:
+        return run_builder_scenario(scenario, shape, number_of_nodes, files_per_folder)
+    tree = generate_tree(shape, number_of_nodes, files_per_folder, file_size)
+    base_folder_name = f"{scenario}_{shape}_{number_of_nodes}"
+    base_folder_path = f"{server.root}/{base_folder_name}"
+    sftp = server.connect()
+    RemoteFolderManager.set_defaults(host_path=server.root, hierarchy_of_folders_to_be_created_inside_root_folder_path=tree)
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            if not scenario.startswith('create'):
+                # the checks run against an existing tree
+                RemoteFolderManager.create_folder_path_recursively(base_folder_path, sftp, use_exec=server.allow_exec,
+                                                                   pipelined=True)
+            if scenario.endswith('regular_folder') or scenario.endswith('regular_folders'):
+                paths = _deepest_paths(tree, base_folder_name, number_of_checked_paths)
+            counter = RequestCounter()
+            tracemalloc.start()
+            start = time.perf_counter()
+            with counter:
+                if scenario == 'create':
+                    RemoteFolderManager.create_folder_path_recursively(base_folder_path, sftp)
+                elif scenario == 'create_pipelined':
+                    RemoteFolderManager.create_folder_path_recursively(base_folder_path, sftp, pipelined=True,
+                                                                       max_requests_in_flight=max_requests_in_flight)
+                elif scenario == 'create_parallel':
+                    RemoteFolderManager.create_folder_path_recursively(base_folder_path, sftp,
+                                                                       number_of_parallel_channels=number_of_parallel_channels)
+                elif scenario == 'create_exec':
+                    RemoteFolderManager.create_folder_path_recursively(base_folder_path, sftp, use_exec=True)
+                elif scenario == 'verify':
+                    RemoteFolderManager.create_folder_path_recursively(base_folder_path, sftp)
+                elif scenario == 'is_path_a_regular_folder':
+                    for path in paths:
+                        RemoteFolderManager.is_path_a_regular_folder(path, sftp)
+                else:
+                    RemoteFolderManager.are_paths_regular_folders(paths, sftp, max_requests_in_flight=max_requests_in_flight)
+            wall_time = time.perf_counter() - start
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    finally:
+        sftp.close()
+        sftp.get_channel().get_transport().close()
+        shutil.rmtree(base_folder_path, ignore_errors=True)
+    return {'scenario': scenario, 'shape': shape, 'nodes': number_of_nodes, 'wall_time_seconds': round(wall_time, 4),
+            'requests': counter.requests, 'round_trips': counter.round_trips, 'peak_memory_bytes': peak_memory}
+
+
+def _relative_paths(tree: Node) -> List[str]:
+    # the paths below the root in pre-order with a trailing / for folders, independent of the order of siblings
+    paths = []
+    names = []
+    for level, node in tree.iterate_pre_order():
+        del names[level:]
+        names.append(node.name)
+        paths.append('/'.join(names[1:]) + ('' if node.is_file else '/'))
+    return sorted(paths)
+
+
+def run_builder_scenario(scenario: str, shape: str, number_of_nodes: int,
+                         files_per_folder: int = 0) -> typing.Dict[str, typing.Union[str, int, float]]:
+    '''
+        Description:
+            Build a generated tree again from its spec file or from a local copy of it and measure the build. The
+            built tree is checked against the generated one: the text spec must render back to the same text as
+            Node.__str__, the JSON Lines spec to the same tree, and the local mirror to the same paths.
+
+        Returns:
+            dict: The same keys as run_scenario, without requests and round trips.
+    '''
+    if scenario not in BUILDER_SCENARIOS:
+        raise ValueError(f"The 'scenario' parameter must be one of {BUILDER_SCENARIOS}.")
+    tree = generate_tree(shape, number_of_nodes, files_per_folder)
+    with tempfile.TemporaryDirectory() as temporary_folder:
+        if scenario == 'build_from_text_spec':
+            source = Path(temporary_folder) / 'spec.txt'
+            with open(source, 'w', encoding='utf-8') as spec_file:
+                tree.write_to(spec_file)
+        elif scenario == 'build_from_json_lines_spec':
+            source = Path(temporary_folder) / 'spec.jsonl'
+            with open(source, 'w', encoding='utf-8') as spec_file:
+                spec_file.writelines(tree.iterate_json_lines())
+        else:
+            paths_per_level = [temporary_folder]
+            for level, node in tree.iterate_pre_order():
+                del paths_per_level[level + 1:]
+                path = os.path.join(paths_per_level[-1], node.name)
+                paths_per_level.append(path)
+                if node.is_file:
+                    open(path, 'wb').close()
+                else:
+                    os.mkdir(path)
+            source = Path(temporary_folder) / tree.name
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        if scenario == 'mirror_local_directory':
+            built = Node.from_pre_order(Node.iterate_local_directory(source))
+        else:
+            built = Node.from_spec_file(source)
+        wall_time = time.perf_counter() - start
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        if scenario == 'build_from_text_spec':
+            round_trip_ok = str(built) == source.read_text(encoding='utf-8')
+        elif scenario == 'build_from_json_lines_spec':
+            round_trip_ok = str(built) == str(tree)
+        else:
+            round_trip_ok = _relative_paths(built) == _relative_paths(tree)
+    if not round_trip_ok:
+        raise ValueError(f"The tree built by {scenario} differs from the generated {shape} tree of {number_of_nodes} nodes.")
+    return {'scenario': scenario, 'shape': shape, 'nodes': number_of_nodes, 'wall_time_seconds': round(wall_time, 4),
+            'requests': 0, 'round_trips': 0, 'peak_memory_bytes': peak_memory}
+
+
+def compare_with_baseline(results: List[dict], baseline: List[dict], tolerance: float = 0.2,
+                          wall_time_tolerance: float = 0.5) -> List[str]:
+    '''
+        Description:
+            Compare results with a saved baseline. Requests, round trips and peak memory may grow by tolerance,
+            the wall time, which is noisier, by wall_time_tolerance.
+
+        Returns:
+            List[str]: One message per regression, empty if there is none.
+    '''
+    baseline_by_key = {(entry['scenario'], entry['shape'], entry['nodes']): entry for entry in baseline}
+    regressions = []
+    for result in results:
+        expected = baseline_by_key.get((result['scenario'], result['shape'], result['nodes']))
+        if expected is None:
+            continue
+        for metric, allowed in (('requests', tolerance), ('round_trips', tolerance), ('peak_memory_bytes', tolerance),
+                                ('wall_time_seconds', wall_time_tolerance)):
+            if result[metric] > expected[metric] * (1 + allowed) and result[metric] - expected[metric] > 1:
+                regressions.append(f"{result['scenario']} {result['shape']} {result['nodes']}: {metric} "
+                                   f"{result[metric]} > baseline {expected[metric]}")
+    return regressions
+
+
+def main(arguments: typing.Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark RemoteFolderManager against a local SFTP server.")
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument('--shapes', nargs='+', default=list(SHAPES), choices=SHAPES)
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000])
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="round trip latency added by the relay")
+    parser.add_argument('--bandwidth-mbps', type=float, default=None, help="bandwidth limit of the relay in Mbit/s")
+    parser.add_argument('--max-requests-in-flight', type=int, default=64)
+    parser.add_argument('--channels', type=int, default=4, help="number of SFTP channels of create_parallel")
+    parser.add_argument('--files-per-folder', type=int, default=0, help="files added to every folder without children")
+    parser.add_argument('--file-size', type=int, default=0, help="content size in bytes of the added files")
+    parser.add_argument('--no-exec', action='store_true', help="refuse exec channels like a locked down account")
+    parser.add_argument('--save-baseline', type=Path)
+    parser.add_argument('--compare-baseline', type=Path)
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    options = parser.parse_args(arguments)
+
+    bandwidth = options.bandwidth_mbps * 125000 if options.bandwidth_mbps else None
+    server = LocalSFTPServer(options.latency_ms / 1000, bandwidth, allow_exec=not options.no_exec)
+    results = []
+    try:
+        for shape in options.shapes:
+            for size in options.sizes:
+                for scenario in options.scenarios:
+                    result = run_scenario(server, scenario, shape, size, options.max_requests_in_flight, options.channels,
+                                          files_per_folder=options.files_per_folder, file_size=options.file_size)
+                    results.append(result)
+                    print(f"{scenario:28} {shape:9} {size:>8} nodes  {result['wall_time_seconds']:>9.3f} s  "
+                          f"{result['requests']:>8} requests  {result['round_trips']:>8} round trips  "
+                          f"{result['peak_memory_bytes'] / 2 ** 20:>8.1f} MiB")
+    finally:
+        server.close()
+
+    if options.save_baseline:
+        options.save_baseline.write_text(json.dumps(results, indent=2))
+    if options.compare_baseline:
+        regressions = compare_with_baseline(results, json.loads(options.compare_baseline.read_text()), options.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
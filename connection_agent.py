@@ -0,0 +1,269 @@
+'''
+Connection agent for RemoteFolderManager. A long lived local process holding authenticated SSH transports per host,
+so short invocations skip the TCP connect, key exchange and authentication of every run. Clients connect to its Unix
+socket, send one JSON request line with the host and credentials and get the socket relayed to a new SFTP channel
+over the warm transport of that host. Transports without channels are closed after the idle timeout, keepalives
+keep the others from being dropped by firewalls.
+
+    python connection_agent.py --socket ~/.plus4data/agent.sock --idle-timeout 600
+
+    RemoteFolderManager.set_defaults(..., agent_socket_path='~/.plus4data/agent.sock')
+'''
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import typing
+from typing import Union
+from pathlib import Path
+import paramiko
+from Plus4Data import DEFAULT_AGENT_SOCKET_PATH, RemoteFolderManager
+
+# the largest request line accepted from a client
+MAXIMUM_REQUEST_SIZE = 64 * 1024
+RELAY_BUFFER_SIZE = 64 * 1024
+
+
+class _WarmTransport:
+    '''
+    One authenticated transport of the agent with the number of channels currently relayed over it and a spare
+    SFTP channel opened in advance, which saves the next client the round trips of opening one.
+    '''
+    def __init__(self):
+        self.transport = None
+        self.spare_channel = None
+        self.active_channels = 0
+        self.last_used = time.monotonic()
+        # held while connecting, so concurrent first requests for a host share one handshake
+        self.lock = threading.Lock()
+
+
+class ConnectionAgent:
+    '''
+    Serves SFTP channels over warm SSH transports on a Unix socket. The socket is only accessible by the user running
+    the agent. Transports are keyed by host, port, user and a hash of password and authentication methods, so a
+    client only gets a transport authenticated with the credentials it sent.
+    '''
+    def __init__(self, socket_path: Union[str, Path] = DEFAULT_AGENT_SOCKET_PATH, idle_timeout_seconds: float = 600.0,
+                 keepalive_seconds: int = 30, logger: Union[None, logging.Logger] = None):
+        if not isinstance(idle_timeout_seconds, (int, float)) or idle_timeout_seconds <= 0:
+            raise ValueError("The 'idle_timeout_seconds' parameter must be a positive number.")
+        if not isinstance(keepalive_seconds, int) or keepalive_seconds < 0:
+            raise ValueError("The 'keepalive_seconds' parameter must be a non negative int.")
+        if not isinstance(logger, (logging.Logger, type(None))):
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
+        self.socket_path = Path(socket_path).expanduser()
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self.logger = logger
+        self._transports = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._listener = None
+
+    def serve_forever(self) -> None:
+        '''
+            Description:
+                Listen on socket_path and serve clients until close is called. A stale socket file left by an
+                agent which is no longer running is replaced, a running agent on the same path raises OSError.
+        '''
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(self.socket_path))
+                raise OSError(f"A connection agent is already listening on {self.socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                self.socket_path.unlink()
+            finally:
+                probe.close()
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous_umask = os.umask(0o177)
+        try:
+            self._listener.bind(str(self.socket_path))
+        finally:
+            os.umask(previous_umask)
+        self._listener.listen(64)
+        threading.Thread(target=self._evict_idle_transports, daemon=True).start()
+        if self.logger:
+            self.logger.info(f"Connection agent listening on {self.socket_path}")
+        while not self._closed.is_set():
+            try:
+                client_socket, _ = self._listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve_client, args=(client_socket,), daemon=True).start()
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._listener is not None:
+            # shutdown wakes the accept of serve_forever
+            try:
+                self._listener.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._listener.close()
+            self._listener = None
+            self.socket_path.unlink(missing_ok=True)
+        with self._lock:
+            warm_transports = list(self._transports.values())
+            self._transports.clear()
+        for warm_transport in warm_transports:
+            if warm_transport.transport is not None:
+                warm_transport.transport.close()
+
+    def statistics(self) -> typing.Dict[str, int]:
+        with self._lock:
+            return {'transports': sum(warm_transport.transport is not None for warm_transport in self._transports.values()),
+                    'active_channels': sum(warm_transport.active_channels for warm_transport in self._transports.values())}
+
+    def _serve_client(self, client_socket: socket.socket) -> None:
+        warm_transport = None
+        try:
+            request = self._read_request(client_socket)
+            warm_transport = self._acquire_transport(request)
+            channel = self._take_sftp_channel(warm_transport)
+        except Exception as e:
+            if warm_transport is not None:
+                self._release_transport(warm_transport)
+            if self.logger:
+                self.logger.error(f"Connection agent request failed: {e}")
+            reply = {'ok': False, 'error': str(e) or type(e).__name__,
+                     'authentication_failed': isinstance(e, paramiko.AuthenticationException)}
+            try:
+                client_socket.sendall(json.dumps(reply).encode() + b'\n')
+            except OSError:
+                pass
+            client_socket.close()
+            return
+        try:
+            client_socket.sendall(b'{"ok": true}\n')
+            self._relay(client_socket, channel)
+        finally:
+            channel.close()
+            client_socket.close()
+            self._release_transport(warm_transport)
+
+    @staticmethod
+    def _read_request(client_socket: socket.socket) -> typing.Dict[str, typing.Any]:
+        # byte by byte, nothing after the request line may be consumed since it belongs to the SFTP session
+        request = b''
+        while not request.endswith(b'\n'):
+            received = client_socket.recv(1)
+            if not received or len(request) > MAXIMUM_REQUEST_SIZE:
+                raise ValueError("incomplete or oversized request")
+            request += received
+        return json.loads(request)
+
+    def _acquire_transport(self, request: typing.Dict[str, typing.Any]) -> _WarmTransport:
+        manager = RemoteFolderManager(hostname=request['hostname'], username=request['username'],
+                                      password=request['password'], port=request['port'],
+                                      auth_methods=request.get('auth_methods'))
+        secret = hashlib.sha256(f"{manager.password}\n{manager.auth_methods}".encode()).hexdigest()
+        key = (manager.hostname, manager.port, manager.username, secret)
+        with self._lock:
+            warm_transport = self._transports.setdefault(key, _WarmTransport())
+            warm_transport.active_channels += 1
+        with warm_transport.lock:
+            if warm_transport.transport is None or not warm_transport.transport.is_active():
+                try:
+                    warm_transport.transport = manager.open_authenticated_transport(request.get('timeout_seconds'))
+                except BaseException:
+                    self._release_transport(warm_transport)
+                    raise
+                warm_transport.transport.set_keepalive(self.keepalive_seconds)
+                if self.logger:
+                    self.logger.info(f"Connection agent connected to {manager.username}@{manager.hostname}:{manager.port}")
+        return warm_transport
+
+    def _take_sftp_channel(self, warm_transport: _WarmTransport) -> paramiko.Channel:
+        # the spare channel if it is still usable, then a new spare is opened in the background for the next client
+        with warm_transport.lock:
+            channel, warm_transport.spare_channel = warm_transport.spare_channel, None
+        if channel is None or channel.closed or channel.get_transport() is not warm_transport.transport:
+            channel = self._open_sftp_channel(warm_transport.transport)
+        threading.Thread(target=self._open_spare_channel, args=(warm_transport,), daemon=True).start()
+        return channel
+
+    def _open_spare_channel(self, warm_transport: _WarmTransport) -> None:
+        with warm_transport.lock:
+            if warm_transport.spare_channel is not None or warm_transport.transport is None:
+                return
+            try:
+                warm_transport.spare_channel = self._open_sftp_channel(warm_transport.transport)
+            except (paramiko.SSHException, OSError):
+                warm_transport.spare_channel = None
+
+    @staticmethod
+    def _open_sftp_channel(transport: paramiko.Transport) -> paramiko.Channel:
+        channel = transport.open_session()
+        channel.invoke_subsystem('sftp')
+        return channel
+
+    def _release_transport(self, warm_transport: _WarmTransport) -> None:
+        with self._lock:
+            warm_transport.active_channels -= 1
+            warm_transport.last_used = time.monotonic()
+
+    @staticmethod
+    def _relay(client_socket: socket.socket, channel: paramiko.Channel) -> None:
+        # one thread per direction, a blocked send in one direction must never stop reading the other
+        def copy(receive, send_all, finish):
+            try:
+                while True:
+                    data = receive(RELAY_BUFFER_SIZE)
+                    if not data:
+                        break
+                    send_all(data)
+            except OSError:
+                pass
+            finally:
+                finish()
+
+        upstream = threading.Thread(target=copy, args=(client_socket.recv, channel.sendall, channel.close), daemon=True)
+        upstream.start()
+        copy(channel.recv, client_socket.sendall, lambda: client_socket.shutdown(socket.SHUT_RDWR))
+        upstream.join()
+
+    def _evict_idle_transports(self) -> None:
+        while not self._closed.wait(min(self.idle_timeout_seconds / 4, 5.0)):
+            now = time.monotonic()
+            with self._lock:
+                idle_keys = [key for key, warm_transport in self._transports.items()
+                             if warm_transport.active_channels == 0 and (now - warm_transport.last_used > self.idle_timeout_seconds
+                             or warm_transport.transport is None or not warm_transport.transport.is_active())]
+                idle_transports = [(key, self._transports.pop(key)) for key in idle_keys]
+            for (hostname, port, username, _), warm_transport in idle_transports:
+                if warm_transport.transport is not None:
+                    warm_transport.transport.close()
+                    if self.logger:
+                        self.logger.info(f"Connection agent closed the idle connection to {username}@{hostname}:{port}")
+
+
+def main(arguments: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Keep SSH connections of RemoteFolderManager warm for short invocations.")
+    parser.add_argument('--socket', type=Path, default=DEFAULT_AGENT_SOCKET_PATH, help="path of the Unix socket")
+    parser.add_argument('--idle-timeout', type=float, default=600.0, help="seconds an unused connection is kept")
+    parser.add_argument('--keepalive', type=int, default=30, help="seconds between keepalives, 0 to disable")
+    parser.add_argument('--log-file', type=Path, help="log to this file instead of stderr")
+    options = parser.parse_args(arguments)
+
+    logging.basicConfig(level=logging.INFO, filename=options.log_file, format='%(asctime)s - %(levelname)s - %(message)s')
+    agent = ConnectionAgent(options.socket, options.idle_timeout, options.keepalive, logging.getLogger('connection_agent'))
+    try:
+        agent.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
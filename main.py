@@ -53,7 +53,7 @@ def main(base_folder_path: Union[str, Path], checkpath: Union[str, Path],
             print(f"{str(checkpath)} exists in remote server")
         else:
             print(f"{str(checkpath)} does not exists in remote server")
-    sftp_client.close()
+    RemoteFolderManager.disconnect_from_sftp(sftp_client)
 
 if __name__ == "__main__":   
     
@@ -0,0 +1,431 @@
+'''
+Persistent local index of remote trees for RemoteFolderManager. A scan walks a remote root with a bounded number of
+concurrent directory listings, each on its own SFTP channel, and stores type, size, mtime and the symbolic link flag
+of every entry in an SQLite file. Later scans are incremental: a directory whose mtime did not change is not listed
+again, only its subdirectories are checked with one pipelined lstat each. Existence and type questions and the
+comparison with a Node structure are then answered locally.
+
+    index = RemoteIndex('~/.plus4data/index.sqlite')
+    index.scan(sftp, '/home/antony/Music/Codingtask')
+    index.is_regular_folder('/home/antony/Music/Codingtask/datas/fauna')
+    RemoteFolderManager.plan_reconciliation(sftp, base_folder_path, structure, remote_index=index)
+'''
+
+import concurrent.futures
+import logging
+import posixpath
+import queue
+import sqlite3
+import stat
+import threading
+import time
+import typing
+from typing import List, Union
+from pathlib import Path
+import paramiko
+from Plus4Data import ITEM_MISSING, ITEM_NOT_A_FILE, ITEM_NOT_A_FOLDER, ITEM_PRESENT, Node, RemoteFolderManager,\
+    SFTPRequestPipeline
+
+ENTRY_FOLDER = 'folder'
+ENTRY_FILE = 'file'
+ENTRY_OTHER = 'other'
+# a directory changed less than this many seconds before it was listed may change again within the same mtime second,
+# it is listed again by the next scan
+RACY_MTIME_SECONDS = 2
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER,
+    mtime INTEGER,
+    is_symlink INTEGER NOT NULL,
+    -- 1 once the children of a folder are in the index
+    listed INTEGER NOT NULL DEFAULT 0,
+    -- mtime of the folder when it was listed, NULL if it has to be listed again
+    listed_mtime INTEGER
+);
+CREATE INDEX IF NOT EXISTS entries_by_parent ON entries (parent);
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY,
+    scanned_at REAL NOT NULL
+);
+'''
+
+
+class IndexEntry:
+    '''
+    One indexed remote path. type is ENTRY_FOLDER, ENTRY_FILE or ENTRY_OTHER, for a symbolic link (is_symlink True)
+    the type of its target at the time of the scan.
+    '''
+    __slots__ = ('path', 'type', 'size', 'mtime', 'is_symlink')
+
+    def __init__(self, path: str, type: str, size: typing.Optional[int], mtime: typing.Optional[int], is_symlink: bool):
+        self.path = path
+        self.type = type
+        self.size = size
+        self.mtime = mtime
+        self.is_symlink = bool(is_symlink)
+
+    def __repr__(self):
+        return f"IndexEntry({self.path!r}, {self.type!r}, size={self.size}, mtime={self.mtime}, is_symlink={self.is_symlink})"
+
+
+class RemoteIndex:
+    '''
+    SQLite backed index of remote trees. Answers are as old as the last scan of the root they belong to, paths outside
+    every scanned root are unknown (None).
+    '''
+    def __init__(self, index_file_path: Union[str, Path], logger: Union[None, logging.Logger] = None):
+        if not isinstance(logger, (logging.Logger, type(None))):
+            raise TypeError("The 'logger' parameter must be either a logging.Logger or a None.")
+        self.index_file_path = Path(index_file_path).expanduser()
+        self.index_file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logger
+        self._database = sqlite3.connect(str(self.index_file_path), check_same_thread=False)
+        self._database.execute('PRAGMA journal_mode=WAL')
+        self._database.execute('PRAGMA synchronous=NORMAL')
+        self._database.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._database.close()
+
+    def scan(self, sftp: paramiko.SFTPClient, root_path: Union[str, Path], max_concurrent_listings: int = 4,\
+            max_requests_in_flight: int = 64) -> typing.Dict[str, typing.Union[int, float]]:
+        '''
+            Description:
+                Bring the index of root_path up to date. Folders are listed on up to max_concurrent_listings SFTP
+                channels opened over the connection of sftp. A folder listed before whose mtime is unchanged keeps its
+                indexed children, only its subfolders are checked with pipelined lstat requests. Entries which
+                disappeared are removed together with everything indexed below them. Links are not followed.
+
+            Args:
+                sftp: The SFTP client providing connection to the remote host.
+                root_path: The absolute remote path to index.
+                max_concurrent_listings: The number of SFTP channels listing folders at the same time.
+                max_requests_in_flight: The maximum number of unanswered lstat requests per channel.
+
+            Returns:
+                dict: folders_listed, folders_unchanged, entries (indexed below root_path), errors and seconds.
+        '''
+        #check instances of datatyes of parametres and raise TypeError if there is a mismatch
+        if not isinstance(sftp, (paramiko.SFTPClient)):
+            raise TypeError("The 'sftp' parameter must be a type paramiko.SFTPClient.")
+
+        if not isinstance(root_path, (str, Path)):
+            raise TypeError("The 'root_path' parameter must be either a string or a Path object.")
+
+        if not isinstance(max_concurrent_listings, int) or max_concurrent_listings < 1:
+            raise ValueError("The 'max_concurrent_listings' parameter must be a positive int.")
+
+        root_path = self._normalize(root_path)
+        started_at = time.perf_counter()
+        statistics = {'folders_listed': 0, 'folders_unchanged': 0, 'entries': 0, 'errors': 0, 'seconds': 0.0}
+        try:
+            root_attr = sftp.lstat(root_path)
+        except IOError:
+            root_attr = None
+
+        with self._lock:
+            if root_attr is None or not stat.S_ISDIR(root_attr.st_mode):
+                self._delete_below(root_path)
+                if root_attr is None:
+                    self._database.execute('DELETE FROM entries WHERE path = ?', (root_path,))
+                else:
+                    self._upsert([self._row(root_path, root_attr, root_attr)])
+            else:
+                stored = self._database.execute('SELECT listed, listed_mtime FROM entries WHERE path = ?', (root_path,)).fetchone()
+                self._database.execute('INSERT INTO entries (path, parent, type, size, mtime, is_symlink, listed, listed_mtime) '
+                    'VALUES (?, ?, ?, ?, ?, 0, ?, ?) ON CONFLICT (path) DO UPDATE SET type = excluded.type, size = excluded.size, '
+                    'mtime = excluded.mtime, is_symlink = 0', (root_path, posixpath.dirname(root_path), ENTRY_FOLDER,\
+                    root_attr.st_size, root_attr.st_mtime, stored[0] if stored else 0, stored[1] if stored else None))
+                self._scan_folders(sftp, root_path, root_attr, max_concurrent_listings, max_requests_in_flight, statistics)
+            self._database.execute('INSERT OR REPLACE INTO roots (path, scanned_at) VALUES (?, ?)', (root_path, time.time()))
+            self._database.commit()
+            statistics['entries'] = self._database.execute('SELECT COUNT(*) FROM entries WHERE path >= ? AND path < ?',\
+                self._below(root_path)).fetchone()[0]
+        statistics['seconds'] = round(time.perf_counter() - started_at, 4)
+        if self.logger:
+            self.logger.info(f"Indexed {root_path}: {statistics}")
+        return statistics
+
+    def _scan_folders(self, sftp: paramiko.SFTPClient, root_path: str, root_attr: paramiko.SFTPAttributes,\
+            max_concurrent_listings: int, max_requests_in_flight: int, statistics: typing.Dict[str, typing.Union[int, float]]) -> None:
+        # the database is only used from this thread, the workers only talk to the server
+        sftp_pool = RemoteFolderManager.open_sftp_channel_pool(sftp, max_concurrent_listings)
+        idle_channels = queue.Queue()
+        for channel in sftp_pool:
+            idle_channels.put(channel)
+
+        def on_idle_channel(function, *args):
+            channel = idle_channels.get()
+            try:
+                return function(channel, *args)
+            finally:
+                idle_channels.put(channel)
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrent_listings) as executor:
+                running = set()
+
+                def submit_folder(path, attr):
+                    stored = self._database.execute('SELECT listed, listed_mtime FROM entries WHERE path = ?', (path,)).fetchone()
+                    if stored is not None and stored[0] and stored[1] is not None and stored[1] == attr.st_mtime:
+                        subfolder_paths = [row[0] for row in self._database.execute(
+                            'SELECT path FROM entries WHERE parent = ? AND type = ? AND is_symlink = 0', (path, ENTRY_FOLDER))]
+                        future = executor.submit(on_idle_channel, self._lstat_paths, subfolder_paths, max_requests_in_flight)
+                        future.task = ('check', path, attr)
+                    else:
+                        future = executor.submit(on_idle_channel, self._list_folder, path)
+                        future.task = ('list', path, attr)
+                    running.add(future)
+
+                submit_folder(root_path, root_attr)
+                while running:
+                    done, running = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        kind, path, attr = future.task
+                        try:
+                            result = future.result()
+                        except IOError as e:
+                            statistics['errors'] += 1
+                            if self.logger:
+                                self.logger.warning(f"Folder cannot be indexed: {path} - {e}")
+                            self._database.execute('UPDATE entries SET listed = 0, listed_mtime = NULL WHERE path = ?', (path,))
+                            continue
+                        if kind == 'list':
+                            statistics['folders_listed'] += 1
+                            subfolders = self._store_listing(path, attr, result)
+                        else:
+                            statistics['folders_unchanged'] += 1
+                            subfolders = self._store_subfolder_attributes(path, result)
+                        for subfolder_path, subfolder_attr in subfolders:
+                            submit_folder(subfolder_path, subfolder_attr)
+                    self._database.commit()
+        finally:
+            for channel in sftp_pool[1:]:
+                channel.close()
+
+    @staticmethod
+    def _list_folder(sftp: paramiko.SFTPClient, path: str) -> List[typing.Tuple[paramiko.SFTPAttributes, typing.Optional[paramiko.SFTPAttributes]]]:
+        # (attributes of the entry, attributes of the link target or None) for every entry of the folder
+        listing = []
+        for attr in sftp.listdir_attr(path):
+            target_attr = None
+            if stat.S_ISLNK(attr.st_mode):
+                try:
+                    target_attr = sftp.stat(f"{path}/{attr.filename}")
+                except IOError:
+                    pass
+            listing.append((attr, target_attr))
+        return listing
+
+    @staticmethod
+    def _lstat_paths(sftp: paramiko.SFTPClient, paths: List[str], max_requests_in_flight: int) -> typing.Dict[str, typing.Optional[paramiko.SFTPAttributes]]:
+        pipeline = SFTPRequestPipeline(sftp, max_requests_in_flight, RemoteFolderManager.get_operation_metrics(sftp))
+        requests_waiting_for_reply = {}
+        attributes = {}
+        paths_to_send = iter(paths)
+        while True:
+            while pipeline.has_free_slot():
+                path = next(paths_to_send, None)
+                if path is None:
+                    break
+                requests_waiting_for_reply[pipeline.send_lstat(path)] = path
+            if not requests_waiting_for_reply:
+                return attributes
+            num, t, msg = pipeline.next_response()
+            path = requests_waiting_for_reply.pop(num)
+            try:
+                attributes[path] = pipeline.read_attributes(t, msg)
+            except IOError:
+                attributes[path] = None
+
+    def _store_listing(self, path: str, attr: paramiko.SFTPAttributes,\
+            listing: List[typing.Tuple[paramiko.SFTPAttributes, typing.Optional[paramiko.SFTPAttributes]]]) -> List[typing.Tuple[str, paramiko.SFTPAttributes]]:
+        present_paths = {f"{path}/{entry_attr.filename}" for entry_attr, _ in listing}
+        for (indexed_path,) in self._database.execute('SELECT path FROM entries WHERE parent = ?', (path,)).fetchall():
+            if indexed_path not in present_paths:
+                self._delete_below(indexed_path)
+                self._database.execute('DELETE FROM entries WHERE path = ?', (indexed_path,))
+        rows = []
+        subfolders = []
+        for entry_attr, target_attr in listing:
+            entry_path = f"{path}/{entry_attr.filename}"
+            rows.append(self._row(entry_path, entry_attr, target_attr))
+            if stat.S_ISDIR(entry_attr.st_mode):
+                subfolders.append((entry_path, entry_attr))
+            else:
+                # a folder replaced by a file or link keeps nothing below it
+                self._delete_below(entry_path)
+        self._upsert(rows)
+        # a folder changed within its last mtime second may change again unnoticed, it is listed again next time
+        recently_changed = attr.st_mtime is None or time.time() - attr.st_mtime < RACY_MTIME_SECONDS
+        self._database.execute('UPDATE entries SET listed = 1, listed_mtime = ? WHERE path = ?',\
+            (None if recently_changed else attr.st_mtime, path))
+        return subfolders
+
+    def _store_subfolder_attributes(self, path: str, attributes: typing.Dict[str, typing.Optional[paramiko.SFTPAttributes]])\
+            -> List[typing.Tuple[str, paramiko.SFTPAttributes]]:
+        subfolders = []
+        for subfolder_path, attr in attributes.items():
+            if attr is None or not stat.S_ISDIR(attr.st_mode):
+                # changed since the listing of the unchanged parent, which is only possible within the racy second
+                self._database.execute('UPDATE entries SET listed_mtime = NULL WHERE path = ?', (path,))
+                continue
+            self._database.execute('UPDATE entries SET size = ?, mtime = ? WHERE path = ?', (attr.st_size, attr.st_mtime, subfolder_path))
+            subfolders.append((subfolder_path, attr))
+        return subfolders
+
+    def _row(self, path: str, attr: paramiko.SFTPAttributes, target_attr: typing.Optional[paramiko.SFTPAttributes]) -> tuple:
+        is_symlink = stat.S_ISLNK(attr.st_mode)
+        described = target_attr if is_symlink else attr
+        if described is None:
+            entry_type = ENTRY_OTHER
+        elif stat.S_ISDIR(described.st_mode):
+            entry_type = ENTRY_FOLDER
+        elif stat.S_ISREG(described.st_mode):
+            entry_type = ENTRY_FILE
+        else:
+            entry_type = ENTRY_OTHER
+        return (path, posixpath.dirname(path), entry_type, attr.st_size, attr.st_mtime, int(is_symlink))
+
+    def _upsert(self, rows: List[tuple]) -> None:
+        # listed and listed_mtime of folders which stay folders are kept, they decide whether to list them again
+        self._database.executemany('INSERT INTO entries (path, parent, type, size, mtime, is_symlink) VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (path) DO UPDATE SET type = excluded.type, size = excluded.size, mtime = excluded.mtime, '
+            'is_symlink = excluded.is_symlink, listed = CASE WHEN excluded.type = type AND excluded.is_symlink = is_symlink '
+            'THEN listed ELSE 0 END', rows)
+
+    def _delete_below(self, path: str) -> None:
+        self._database.execute('DELETE FROM entries WHERE path >= ? AND path < ?', self._below(path))
+
+    @staticmethod
+    def _below(path: str) -> typing.Tuple[str, str]:
+        # every path below path sorts between path + '/' and path + '0', '0' being the character after '/'
+        prefix = path.rstrip('/')
+        return prefix + '/', prefix + '0'
+
+    @staticmethod
+    def _normalize(path: Union[str, Path]) -> str:
+        return posixpath.normpath(str(path))
+
+    def lookup(self, path: Union[str, Path]) -> typing.Optional[IndexEntry]:
+        '''
+            Description:
+                The indexed entry of path, None if it is not in the index.
+        '''
+        path = self._normalize(path)
+        with self._lock:
+            row = self._database.execute('SELECT path, type, size, mtime, is_symlink FROM entries WHERE path = ?', (path,)).fetchone()
+        return IndexEntry(*row) if row is not None else None
+
+    def exists(self, path: Union[str, Path]) -> typing.Optional[bool]:
+        '''
+            Description:
+                Whether path existed at the last scan, None if the index does not know it because the deepest indexed
+                ancestor of path was never listed or is a link.
+        '''
+        path = self._normalize(path)
+        with self._lock:
+            if self._database.execute('SELECT 1 FROM entries WHERE path = ?', (path,)).fetchone() is not None:
+                return True
+            ancestor_path = posixpath.dirname(path)
+            while True:
+                ancestor = self._database.execute('SELECT listed, type, is_symlink FROM entries WHERE path = ?',\
+                    (ancestor_path,)).fetchone()
+                if ancestor is not None or ancestor_path == posixpath.dirname(ancestor_path):
+                    break
+                ancestor_path = posixpath.dirname(ancestor_path)
+        if ancestor is None:
+            return None
+        if ancestor[1] != ENTRY_FOLDER:
+            return False
+        return False if ancestor[0] and not ancestor[2] else None
+
+    def is_regular_folder(self, path: Union[str, Path]) -> typing.Optional[bool]:
+        '''
+            Description:
+                Whether path was a folder and not a symbolic link at the last scan, None if it is unknown.
+        '''
+        entry = self.lookup(path)
+        if entry is None:
+            return None if self.exists(path) is None else False
+        return entry.type == ENTRY_FOLDER and not entry.is_symlink
+
+    def iterate_children(self, path: Union[str, Path]) -> typing.Iterator[IndexEntry]:
+        path = self._normalize(path)
+        with self._lock:
+            rows = self._database.execute('SELECT path, type, size, mtime, is_symlink FROM entries WHERE parent = ? ORDER BY path',\
+                (path,)).fetchall()
+        for row in rows:
+            yield IndexEntry(*row)
+
+    def scanned_at(self, root_path: Union[str, Path]) -> typing.Optional[float]:
+        with self._lock:
+            row = self._database.execute('SELECT scanned_at FROM roots WHERE path = ?', (self._normalize(root_path),)).fetchone()
+        return row[0] if row is not None else None
+
+    def to_node(self, path: Union[str, Path]) -> Node:
+        '''
+            Description:
+                Export the indexed subtree below path as a Node hierarchy whose root is named after path. Links to
+                folders become folders without children, other links and special files become files.
+        '''
+        path = self._normalize(path)
+        entry = self.lookup(path)
+        if entry is None:
+            raise FileNotFoundError(f"{path} is not in the index")
+        root = Node(posixpath.basename(path), is_file=entry.type != ENTRY_FOLDER)
+        folders = {path: root}
+        with self._lock:
+            # parents sort before their children, so every parent is already built when its children come
+            rows = self._database.execute('SELECT path, parent, type FROM entries WHERE path >= ? AND path < ? ORDER BY path',\
+                self._below(path)).fetchall()
+        for entry_path, parent, entry_type in rows:
+            parent_node = folders.get(parent)
+            if parent_node is None:
+                continue
+            node = Node(posixpath.basename(entry_path), is_file=entry_type != ENTRY_FOLDER)
+            parent_node.subfolders.append(node)
+            if entry_type == ENTRY_FOLDER:
+                folders[entry_path] = node
+        return root
+
+    def compare_node_tree(self, base_folder_path: Union[str, Path], node: Node) -> typing.Iterator[typing.Tuple[str, str, Node]]:
+        '''
+            Description:
+                Local counterpart of the remote comparison of RemoteFolderManager: yields (status, path, node) for
+                every node of the structure whose parent folder exists, status being ITEM_PRESENT, ITEM_MISSING,
+                ITEM_NOT_A_FOLDER or ITEM_NOT_A_FILE. Links are followed like a stat would.
+
+            Raises:
+                LookupError: If a folder of the structure is not listed in the index, for example a linked folder.
+        '''
+        stack = [(self._normalize(base_folder_path), Node.expand_templates([node]))]
+        while stack:
+            folder_path, children = stack.pop()
+            with self._lock:
+                folder = self._database.execute('SELECT listed, is_symlink FROM entries WHERE path = ?', (folder_path,)).fetchone()
+                if folder is None or not folder[0] or folder[1]:
+                    raise LookupError(f"The children of {folder_path} are not in the index")
+                types_by_name = {posixpath.basename(row[0]): row[1] for row in self._database.execute(
+                    'SELECT path, type FROM entries WHERE parent = ?', (folder_path,))}
+            folders_to_compare = []
+            for child in children:
+                path = f"{folder_path}/{child.name}"
+                entry_type = types_by_name.get(child.name)
+                if entry_type is None:
+                    yield ITEM_MISSING, path, child
+                elif child.is_file and entry_type == ENTRY_FOLDER:
+                    yield ITEM_NOT_A_FILE, path, child
+                elif not child.is_file and entry_type != ENTRY_FOLDER:
+                    yield ITEM_NOT_A_FOLDER, path, child
+                else:
+                    yield ITEM_PRESENT, path, child
+                    if not child.is_file and child.has_children():
+                        folders_to_compare.append((path, child.iterate_children()))
+            stack.extend(reversed(folders_to_compare))
@@ -0,0 +1,131 @@
+'''
+Round trip and error tests of the Node builders: the indented text printed by Node.__str__, JSON Lines, nested JSON
+documents and local folders.
+
+    python -m pytest -q test_node_builders.py
+'''
+
+import io
+import json
+import pytest
+from Plus4Data import CompactNodeTree, Node, TemplatedNode
+
+
+def sample_tree() -> Node:
+    return Node('datas', [
+        Node('fauna', [Node('birds', [Node('app.ini', is_file=True)]), Node('fish')]),
+        Node(' name with spaces '),
+        Node('[DIR] looks like a marker', [Node('[FILE] too', is_file=True)]),
+        TemplatedNode('shard_{:02d}', range(3), [Node('in'), Node('out')]),
+        Node('readme.txt', is_file=True),
+    ])
+
+
+def test_text_spec_round_trip():
+    text = str(sample_tree())
+    assert str(Node.from_pre_order(Node.iterate_spec_lines(io.StringIO(text)))) == text
+
+
+def test_text_spec_round_trip_of_rebuilt_tree():
+    text = str(sample_tree())
+    rebuilt = Node.from_pre_order(Node.iterate_spec_lines(text.splitlines()))
+    assert str(Node.from_pre_order(Node.iterate_spec_lines(str(rebuilt).splitlines()))) == text
+
+
+def test_text_spec_levels_are_relative_to_the_first_line():
+    tree = sample_tree()
+    assert str(Node.from_pre_order(Node.iterate_spec_lines(io.StringIO(tree.__str__(3))))) == str(tree)
+
+
+def test_text_spec_skips_blank_lines_and_windows_line_ends():
+    spec = "[DIR] datas\r\n\r\n  [FILE] a.txt\r\n  [DIR] b\r\n"
+    assert str(Node.from_pre_order(Node.iterate_spec_lines(io.StringIO(spec)))) == "[DIR] datas\n  [FILE] a.txt\n  [DIR] b\n"
+
+
+def test_json_lines_round_trip():
+    tree = sample_tree()
+    assert str(Node.from_pre_order(Node.iterate_json_lines_spec(tree.iterate_json_lines()))) == str(tree)
+
+
+def test_nested_json_document():
+    document = {'name': 'datas', 'children': [{'name': 'fauna', 'children': [{'name': 'app.ini', 'is_file': True}]},
+                                               {'name': 'flora'}]}
+    tree = Node.from_pre_order(Node.iterate_json_spec(document))
+    assert str(tree) == "[DIR] datas\n  [DIR] fauna\n    [FILE] app.ini\n  [DIR] flora\n"
+
+
+def test_compact_tree_takes_the_same_tuples():
+    text = str(sample_tree())
+    assert str(CompactNodeTree.from_pre_order(Node.iterate_spec_lines(text.splitlines()))) == text
+
+
+@pytest.mark.parametrize('suffix, write', [
+    ('.txt', lambda tree: str(tree)),
+    ('.jsonl', lambda tree: ''.join(tree.iterate_json_lines())),
+])
+def test_from_spec_file(tmp_path, suffix, write):
+    tree = sample_tree()
+    spec_file_path = tmp_path / f"layout{suffix}"
+    spec_file_path.write_text(write(tree), encoding='utf-8')
+    assert str(Node.from_spec_file(spec_file_path)) == str(tree)
+
+
+def test_from_spec_file_reads_nested_json(tmp_path):
+    spec_file_path = tmp_path / 'layout.json'
+    spec_file_path.write_text(json.dumps({'name': 'datas', 'children': [{'name': 'a', 'is_file': True}]}))
+    assert str(Node.from_spec_file(spec_file_path)) == "[DIR] datas\n  [FILE] a\n"
+
+
+@pytest.mark.parametrize('spec, message', [
+    ("[DIR] datas\n   [DIR] odd\n", "line 2: the indentation must be two spaces per level"),
+    ("[DIR] datas\n  [FILE] a.txt\n    [DIR] inside\n", "can not be added inside a file"),
+    ("[DIR] datas\n    [DIR] skipped a level\n", "does not follow the pre-order"),
+    ("[DIR] datas\n[DIR] second root\n", "does not follow the pre-order"),
+    ("[DIR] datas\n  fauna\n", "line 2: expected '[DIR] name' or '[FILE] name'"),
+    ("\n\n", "The tree is empty"),
+])
+def test_text_spec_errors(spec, message):
+    with pytest.raises(ValueError, match=message.replace('[', r'\[').replace(']', r'\]')):
+        Node.from_pre_order(Node.iterate_spec_lines(io.StringIO(spec)))
+
+
+@pytest.mark.parametrize('lines, message', [
+    (['{"level": 0, "name": "datas"}\n', 'not json\n'], "line 2"),
+    (['{"level": 0, "name": "datas"}\n', '{"name": "no level"}\n'], "line 2"),
+    (['[0, "datas", false]\n'], "line 1"),
+    (['{"level": 0, "name": "datas"}\n', '{"level": 2, "name": "deep"}\n'], "does not follow the pre-order"),
+    (['{"level": 0, "name": "a", "is_file": true}\n', '{"level": 1, "name": "b"}\n'], "can not be added inside a file"),
+])
+def test_json_lines_errors(lines, message):
+    with pytest.raises(ValueError, match=message):
+        Node.from_pre_order(Node.iterate_json_lines_spec(lines))
+
+
+def test_nested_json_error():
+    with pytest.raises(ValueError, match="must be an object with a name"):
+        Node.from_pre_order(Node.iterate_json_spec({'name': 'datas', 'children': [{'is_file': True}]}))
+
+
+def test_local_directory_mirror(tmp_path):
+    root = tmp_path / 'datas'
+    (root / 'fauna' / 'birds').mkdir(parents=True)
+    (root / 'fauna' / 'app.ini').write_bytes(b'[app]\n')
+    (root / 'flora').mkdir()
+    (root / 'link.ini').symlink_to(root / 'fauna' / 'app.ini')
+    (root / 'loop').symlink_to(root)
+
+    tree = Node.from_pre_order(Node.iterate_local_directory(root))
+    assert str(tree) == "[DIR] datas\n  [DIR] fauna\n    [FILE] app.ini\n    [DIR] birds\n  [DIR] flora\n  [FILE] link.ini\n"
+    files = {node.name: node.content for _, node in tree.iterate_pre_order() if node.is_file}
+    assert files == {'app.ini': root / 'fauna' / 'app.ini', 'link.ini': root / 'link.ini'}
+    assert b''.join(bytes(chunk) for chunk in tree.subfolders[0].subfolders[0].iterate_content_chunks()) == b'[app]\n'
+
+    followed = Node.from_pre_order(Node.iterate_local_directory(root, include_content=False, follow_symlinks=True))
+    assert str(followed) == str(tree)
+    assert all(node.content is None for _, node in followed.iterate_pre_order())
+
+
+def test_local_directory_must_be_a_folder(tmp_path):
+    (tmp_path / 'file').write_bytes(b'')
+    with pytest.raises(NotADirectoryError):
+        list(Node.iterate_local_directory(tmp_path / 'file'))
@@ -0,0 +1,178 @@
+'''
+Tests of RemoteFolderManager against the in process SFTP server of benchmark.py: the pipelined creation engine
+against the serial one, journaled resume, reconciliation, the bulk path check and the refresh of RemoteIndex.
+
+    python -m pytest -q test_remote_folder_manager.py
+'''
+
+import os
+import pytest
+from benchmark import LocalSFTPServer
+from Plus4Data import CreationJournal, Node, RemoteFolderManager, TemplatedNode
+from remote_index import RemoteIndex
+
+
+def sample_tree() -> Node:
+    return Node('datas', [
+        Node('fauna', [Node('birds', [Node('app.ini', is_file=True, content=b'[app]\n')]), Node('fish')]),
+        TemplatedNode('shard_{:02d}', range(5), [Node('in'), Node('out', [Node('part.bin', is_file=True)])]),
+        Node('readme.txt', is_file=True, content=b'read me\n'),
+    ])
+
+
+def local_tree(path: str) -> dict:
+    # relative path -> file content, None for folders
+    tree = {}
+    for folder_path, folder_names, file_names in os.walk(path):
+        for name in folder_names:
+            tree[os.path.relpath(os.path.join(folder_path, name), path)] = None
+        for name in file_names:
+            with open(os.path.join(folder_path, name), 'rb') as file:
+                tree[os.path.relpath(os.path.join(folder_path, name), path)] = file.read()
+    return tree
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = LocalSFTPServer(allow_exec=False)
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def sftp(server):
+    sftp = server.connect()
+    yield sftp
+    sftp.get_channel().get_transport().close()
+
+
+@pytest.fixture
+def manager(server):
+    return RemoteFolderManager(host_path=server.root, hierarchy_of_folders_to_be_created_inside_root_folder_path=sample_tree(),
+                               hostname='127.0.0.1', port=server.port, log_node_events=False)
+
+
+@pytest.fixture
+def base_folder_path(server, request):
+    return f"{server.root}/{request.node.name.replace('[', '_').replace(']', '')}"
+
+
+def test_pipelined_creation_matches_serial_creation(server, sftp, manager):
+    serial = manager.create_folder_path_recursively(f"{server.root}/serial", sftp)
+    pipelined = manager.create_folder_path_recursively(f"{server.root}/pipelined", sftp, pipelined=True,
+                                                       max_requests_in_flight=4)
+    assert pipelined == serial == 1 + 4 + 5 * 4 + 1 + 1
+    assert local_tree(f"{server.root}/pipelined") == local_tree(f"{server.root}/serial")
+
+
+@pytest.mark.parametrize('existing_path, make_existing', [
+    ('datas/readme.txt', lambda path: open(path, 'wb').close()),
+    ('datas/fauna/fish', lambda path: open(path, 'wb').close()),
+    ('datas/fauna/birds/app.ini', os.mkdir),
+])
+def test_pipelined_creation_fails_like_serial_creation(server, sftp, manager, existing_path, make_existing):
+    errors = []
+    for engine in (manager.create_folders_from_node_tree_recursively, manager.create_folders_from_node_tree_pipelined):
+        base_folder_path = f"{server.root}/{engine.__name__}_{existing_path.replace('/', '_')}"
+        os.makedirs(os.path.dirname(f"{base_folder_path}/{existing_path}"))
+        make_existing(f"{base_folder_path}/{existing_path}")
+        with pytest.raises(IOError) as raised:
+            engine(sftp, base_folder_path, sample_tree())
+        errors.append(type(raised.value))
+    assert errors[0] is errors[1]
+
+
+def test_journaled_creation_resumes_after_a_failure(server, sftp, manager, base_folder_path, tmp_path):
+    calls = []
+    record_created = RemoteFolderManager._record_created
+
+    def fail_after_ten_records(sftp, path, is_file, checksum=None):
+        calls.append(path)
+        if len(calls) == 10:
+            raise IOError('connection dropped')
+        record_created(sftp, path, is_file, checksum)
+
+    manager._record_created = fail_after_ten_records
+    with pytest.raises(IOError, match='connection dropped'):
+        manager.create_folder_path_recursively(base_folder_path, sftp, journal_folder_path=tmp_path, journal_batch_size=2)
+    del manager._record_created
+    assert len(list(tmp_path.glob('*.journal'))) == 1
+
+    created = manager.create_folder_path_recursively(base_folder_path, sftp, pipelined=True, journal_folder_path=tmp_path)
+    assert created == 1 + 4 + 5 * 4 + 1 + 1 - 10
+    assert list(tmp_path.glob('*.journal')) == []
+    manager.create_folder_path_recursively(f"{base_folder_path}_expected", sftp)
+    assert local_tree(base_folder_path) == local_tree(f"{base_folder_path}_expected")
+
+
+def test_journal_is_not_kept_for_an_incomplete_existing_base(sftp, manager, base_folder_path, tmp_path):
+    os.makedirs(f"{base_folder_path}/datas/fauna")
+    for _ in range(2):
+        with pytest.raises(FileNotFoundError):
+            manager.create_folder_path_recursively(base_folder_path, sftp, journal_folder_path=tmp_path)
+        assert not CreationJournal.journal_file_path_for(tmp_path, manager.hostname, manager.port, base_folder_path,
+                                                         manager.hierarchy_of_folders_to_be_created_inside_root_folder_path).exists()
+
+
+def test_reconciliation_dry_run_then_apply(sftp, manager, base_folder_path):
+    os.makedirs(f"{base_folder_path}/datas/fauna/birds")
+    os.makedirs(f"{base_folder_path}/datas/shard_03/out")
+
+    plan = manager.reconcile_folder_path(base_folder_path, sftp, dry_run=True)
+    assert not plan.base_folder_missing and plan.type_conflicts == []
+    assert f"{base_folder_path}/datas/fauna/fish" in plan.missing_folders
+    assert f"{base_folder_path}/datas/shard_03/out" not in plan.missing_folders
+    assert f"{base_folder_path}/datas/shard_03/out/part.bin" in plan.missing_files
+    assert plan.number_of_folders_and_files_created == 0
+    assert not os.path.exists(f"{base_folder_path}/datas/fauna/fish")
+
+    applied = manager.reconcile_folder_path(base_folder_path, sftp)
+    assert applied.number_of_folders_and_files_created == len(plan.missing_folders) + len(plan.missing_files)
+    manager.verify_folders_from_node_tree(sftp, base_folder_path, sample_tree())
+    assert manager.reconcile_folder_path(base_folder_path, sftp, dry_run=True).subtrees_to_create == []
+
+
+def test_reconciliation_refuses_type_conflicts(sftp, manager, base_folder_path):
+    os.makedirs(f"{base_folder_path}/datas/readme.txt")
+    with pytest.raises(FileExistsError):
+        manager.reconcile_folder_path(base_folder_path, sftp)
+    assert os.listdir(f"{base_folder_path}/datas") == ['readme.txt']
+
+
+def test_bulk_path_check_matches_single_path_check(server, sftp, manager, base_folder_path):
+    name = os.path.basename(base_folder_path)
+    os.makedirs(f"{base_folder_path}/a/b/c")
+    open(f"{base_folder_path}/a/file", 'wb').close()
+    os.symlink(f"{base_folder_path}/a/b", f"{base_folder_path}/a/link")
+    paths = [f"{name}/a", f"{name}/a/b/c", f"{name}/a/b/c/", f"{name}/a/file", f"{name}/a/file/below", f"{name}/a/link",
+             f"{name}/a/link/c", f"{name}/missing/x", name, f"{name}/a/b"]
+    assert manager.are_paths_regular_folders(paths, sftp, max_requests_in_flight=2) ==\
+        {path: manager.is_path_a_regular_folder(path, sftp) for path in paths}
+
+
+def test_remote_index_refresh(sftp, base_folder_path, tmp_path):
+    os.makedirs(f"{base_folder_path}/a/b")
+    os.makedirs(f"{base_folder_path}/c")
+    # folders changed within RACY_MTIME_SECONDS of a scan are listed again by the next one
+    for path in ('a/b', 'a', 'c', ''):
+        os.utime(f"{base_folder_path}/{path}", (1000, 1000))
+    index = RemoteIndex(tmp_path / 'index.sqlite')
+    try:
+        first = index.scan(sftp, base_folder_path, max_concurrent_listings=2)
+        assert (first['folders_listed'], first['entries']) == (4, 3)
+        assert index.is_regular_folder(f"{base_folder_path}/a/b") is True
+        assert index.exists(f"{base_folder_path}/a/new") is False
+
+        unchanged = index.scan(sftp, base_folder_path, max_concurrent_listings=2)
+        assert (unchanged['folders_listed'], unchanged['folders_unchanged'], unchanged['entries']) == (0, 4, 3)
+
+        os.rmdir(f"{base_folder_path}/a/b")
+        os.mkdir(f"{base_folder_path}/a/new")
+        os.utime(f"{base_folder_path}/a/new", (1000, 1000))
+        os.utime(f"{base_folder_path}/a", (2000, 2000))
+        refreshed = index.scan(sftp, base_folder_path, max_concurrent_listings=2)
+        assert (refreshed['folders_listed'], refreshed['entries']) == (2, 3)
+        assert index.exists(f"{base_folder_path}/a/b") is False
+        assert index.is_regular_folder(f"{base_folder_path}/a/new") is True
+    finally:
+        index.close()